@@ -1,23 +1,53 @@
 """Authentication routes."""
+import asyncio
+import time
 from fastapi import APIRouter, Depends, Request, Form, Query
 from fastapi.responses import RedirectResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.db.session import get_db
-from app.db.models import User
-from app.services.auth_service import authenticate_user, create_user
-from app.services.exam_service import ExamService
+from app.services.auth_service import authenticate_user, create_user, get_user_by_email_cached
+from app.services.exam_service import exam_service
+from app.core.security import SESSION_COOKIE, SESSION_MAX_AGE, create_session_token
+from app.api.responses import SharedRedirectResponse
 
 router = APIRouter()
 
+# Every login attempt takes at least this long, so success, wrong password
+# and unknown email are indistinguishable by response time
+LOGIN_MIN_SECONDS = 0.25
+
+# Fixed-target redirects, built once
+INVALID_LOGIN_REDIRECT = SharedRedirectResponse(url="/?error=invalid_login", status_code=302)
+EMAIL_EXISTS_REDIRECT = SharedRedirectResponse(url="/signup?error=email_exists", status_code=302)
+ACCOUNT_CREATED_REDIRECT = SharedRedirectResponse(url="/?success=account_created", status_code=302)
+
+# Post-login landing page for each role
+ROLE_DASHBOARDS = {
+    "student": "/student/dashboard",
+    "teacher": "/teacher/dashboard",
+}
+
+
+def _set_session_cookie(response: RedirectResponse, user) -> None:
+    """Attach the signed session cookie identifying ``user``."""
+    response.set_cookie(
+        key=SESSION_COOKIE,
+        value=create_session_token(user.id, user.email, user.role, user.first_name, user.last_name),
+        max_age=SESSION_MAX_AGE,
+        httponly=True,
+        samesite="lax"
+    )
+
 
 @router.get("/lookup-email")
-async def lookup_email(
+def lookup_email(
     email: str = Query(..., min_length=1),
     db: Session = Depends(get_db)
 ):
     """Return user first name and role if email is registered (for login page hello message)."""
     email = email.strip().lower()
-    user = db.query(User).filter(User.email == email).first()
+    user = get_user_by_email_cached(db, email)
     if not user:
         return JSONResponse(content={"found": False})
     return JSONResponse(content={
@@ -35,38 +65,34 @@ async def login(
     db: Session = Depends(get_db)
 ):
     """Login and start exam session."""
+    start = time.perf_counter()
     
-    # Check email/password
-    user = authenticate_user(db, email, password)
+    # Check email/password (blocking DB work runs off the event loop)
+    user = await run_in_threadpool(authenticate_user, db, email, password)
+    await asyncio.sleep(max(0.0, LOGIN_MIN_SECONDS - (time.perf_counter() - start)))
     if not user:
-        return RedirectResponse(url="/?error=invalid_login", status_code=302)
-    
-    # If the user is a student, redirect to student dashboard
-    if user.role == "student":
-        response = RedirectResponse(url="/student/dashboard", status_code=302)
-        response.set_cookie(key="username", value=email)
-        return response
+        return INVALID_LOGIN_REDIRECT
     
-    # If the user is a teacher, redirect to teacher dashboard
-    if user.role == "teacher":
-        response = RedirectResponse(url="/teacher/dashboard", status_code=302)
-        response.set_cookie(key="username", value=email)
+    # Students and teachers go to their dashboard
+    dashboard_url = ROLE_DASHBOARDS.get(user.role)
+    if dashboard_url:
+        response = RedirectResponse(url=dashboard_url, status_code=302)
+        _set_session_cookie(response, user)
         return response
     
     # Otherwise (other roles) → start exam as before
-    exam_service = ExamService()
     exam = await exam_service.start_exam(db, email)  # email used as placeholder username
     
     # Redirect to the normal exam route
     response = RedirectResponse(url=f"/api/exam/{exam.id}", status_code=302)
     response.set_cookie(key="exam_id", value=str(exam.id))
-    response.set_cookie(key="username", value=email)
+    _set_session_cookie(response, user)
     
     return response
 
 
 @router.post("/signup")
-async def signup(
+def signup(
     request: Request,
     email: str = Form(...),
     password: str = Form(...),
@@ -96,7 +122,7 @@ async def signup(
     )
     if not user:
         # User already exists or creation failed
-        return RedirectResponse(url="/signup?error=email_exists", status_code=302)
+        return EMAIL_EXISTS_REDIRECT
     
     # Account created successfully - redirect to unified login page with success message
-    return RedirectResponse(url="/?success=account_created", status_code=302)
\ No newline at end of file
+    return ACCOUNT_CREATED_REDIRECT
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""Shared FastAPI dependencies."""
+from typing import Optional
+from fastapi import Depends, Request
+from starlette.datastructures import FormData
+from sqlalchemy.orm import Session
+from app.core.security import SESSION_COOKIE, decode_session_token
+from app.db.models import Exam
+from app.db.session import get_db
+from app.services.auth_service import SessionUser
+
+
+def current_user(request: Request) -> Optional[SessionUser]:
+    """Identify the logged-in user from the signed session cookie.
+    
+    Pure CPU work: the token carries the user's id and role, so no database
+    lookup is needed. Returns None when the cookie is missing or invalid.
+    """
+    claims = decode_session_token(request.cookies.get(SESSION_COOKIE, ""))
+    if not claims:
+        return None
+    return SessionUser(
+        id=claims["uid"],
+        email=claims["email"],
+        role=claims["role"],
+        first_name=claims.get("fn", ""),
+        last_name=claims.get("ln", "")
+    )
+
+
+def current_teacher(user: Optional[SessionUser] = Depends(current_user)) -> Optional[SessionUser]:
+    """Resolve the logged-in teacher from the signed session cookie.
+    
+    Like ``current_user`` this needs no database lookup. Returns None when
+    nobody is logged in or the account isn't a teacher.
+    """
+    if user is None or user.role != "teacher":
+        return None
+    return user
+
+
+def current_student(user: Optional[SessionUser] = Depends(current_user)) -> Optional[SessionUser]:
+    """Resolve the logged-in student from the signed session cookie.
+    
+    Returns None when nobody is logged in or the account isn't a student.
+    """
+    if user is None or user.role != "student":
+        return None
+    return user
+
+
+async def request_form(request: Request) -> FormData:
+    """Parse the request body as form data.
+    
+    Async so the body is read on the event loop; handlers that take the
+    parsed form this way can be plain ``def`` and run their database work
+    in the threadpool.
+    """
+    return await request.form()
+
+
+def owned_exam(
+    exam_id: str,
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher)
+) -> Optional[Exam]:
+    """Load the exam identified by ``exam_id`` if the logged-in teacher owns it.
+    
+    Ownership is part of the query, so one SELECT both fetches and authorizes
+    the exam. Returns None when nobody is logged in or the exam is missing or
+    belongs to another instructor.
+    """
+    if user is None:
+        return None
+    return db.query(Exam).filter(Exam.exam_id == exam_id, Exam.instructor_id == user.id).first()
@@ -3,41 +3,31 @@ import logging
 from fastapi import APIRouter, Depends, Request, HTTPException, Form
 from fastapi.responses import RedirectResponse, HTMLResponse
 from sqlalchemy.orm import Session
-from jinja2 import Environment, FileSystemLoader
 from app.db.session import get_db
+from app.db.models import Student, User
 from app.db.repo import ExamRepository, QuestionRepository
-from app.services.exam_service import ExamService
+from app.services.auth_service import get_user_by_email_cached
+from app.services.exam_service import exam_service
+from app.services.notification_service import notification_service
+from app.services.email_service import get_email_service
 from app.core.schemas.api_models import AnswerSubmission
+from app.templating import render_template, stream_template
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Templates
-env = Environment(loader=FileSystemLoader("app/templates"))
-
-
-def render_template(template_name: str, context: dict) -> HTMLResponse:
-    """Render a Jinja2 template."""
-    template = env.get_template(template_name)
-    html_content = template.render(**context)
-    return HTMLResponse(content=html_content)
-
 
 @router.get("/exam/{exam_id}", response_class=HTMLResponse)
-async def get_exam(request: Request, exam_id: int, db: Session = Depends(get_db)):
+def get_exam(request: Request, exam_id: int, db: Session = Depends(get_db)):
     """Get current question for exam."""
-    from app.db.repo import ExamRepository, QuestionRepository
-    
-    exam_service = ExamService()
-    
-    # Get exam to check if it exists
-    exam = ExamRepository.get(db, exam_id)
+    # Load the exam and its questions in one round trip
+    exam = ExamRepository.get_with_questions(db, exam_id)
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
     
     # Check if exam has any questions
-    questions = QuestionRepository.get_by_exam(db, exam_id)
+    questions = exam.questions
     
     if len(questions) == 0:
         # No questions yet - exam might not be ready
@@ -48,22 +38,22 @@ async def get_exam(request: Request, exam_id: int, db: Session = Depends(get_db)
             "exam_id": exam_id
         })
     
-    question = await exam_service.get_current_question(db, exam_id)
+    # Current question is the first unanswered one
+    question = next((q for q in questions if q.student_answer is None), None)
     
     if question is None:
         # All questions answered, redirect to completion
         return RedirectResponse(url=f"/api/exam/{exam_id}/complete", status_code=302)
     
-    # Get exam status
-    status = exam_service.get_exam_status(db, exam_id)
+    questions_completed = sum(1 for q in questions if q.student_answer is not None)
     
     # Pass exam timing information for timer display - simplified: just pass duration
-    return render_template("question.html", {
+    return stream_template("question.html", {
         "request": request,
         "question": question,
         "exam_id": exam_id,
-        "question_number": status["questions_completed"] + 1,
-        "total_questions": status["total_questions"],
+        "question_number": questions_completed + 1,
+        "total_questions": len(questions),
         "is_timed": exam.is_timed,
         "duration_hours": exam.duration_hours if exam.is_timed else None,
         "duration_minutes": exam.duration_minutes if exam.is_timed else None
@@ -79,14 +69,11 @@ async def submit_answer(
     db: Session = Depends(get_db)
 ):
     """Submit an answer for a question."""
-    exam_service = ExamService()
-    
     # Submit and grade answer
-    question = await exam_service.submit_answer(db, question_id, answer)
+    question, questions_completed, total_questions = await exam_service.submit_answer(db, question_id, answer)
     
     # Check if exam is complete
-    status = exam_service.get_exam_status(db, exam_id)
-    if status["questions_completed"] >= status["total_questions"]:
+    if question and questions_completed >= total_questions:
         # Complete the exam
         await exam_service.complete_exam(db, exam_id)
         return RedirectResponse(url=f"/api/exam/{exam_id}/complete", status_code=302)
@@ -96,7 +83,7 @@ async def submit_answer(
 
 
 @router.get("/exam/{exam_id}/complete", response_class=HTMLResponse)
-async def exam_complete(request: Request, exam_id: int, db: Session = Depends(get_db)):
+def exam_complete(request: Request, exam_id: int, db: Session = Depends(get_db)):
     """Show exam completion page with final grade."""
     exam = ExamRepository.get(db, exam_id)
     if not exam:
@@ -112,7 +99,7 @@ async def exam_complete(request: Request, exam_id: int, db: Session = Depends(ge
 
 
 @router.get("/exam/{exam_id}/dispute", response_class=HTMLResponse)
-async def dispute_grade_page(request: Request, exam_id: int, db: Session = Depends(get_db)):
+def dispute_grade_page(request: Request, exam_id: int, db: Session = Depends(get_db)):
     """Show dispute grade form."""
     exam = ExamRepository.get(db, exam_id)
     if not exam:
@@ -136,16 +123,13 @@ async def dispute_grade_page(request: Request, exam_id: int, db: Session = Depen
 
 
 @router.post("/exam/{exam_id}/dispute")
-async def submit_dispute(
+def submit_dispute(
     request: Request,
     exam_id: int,
     dispute_reason: str = Form(...),
     db: Session = Depends(get_db)
 ):
     """Submit a grade dispute."""
-    from app.db.models import Exam, Notification, User
-    from app.services.notification_service import NotificationService
-    
     exam = ExamRepository.get(db, exam_id)
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
@@ -166,7 +150,6 @@ async def submit_dispute(
     
     # Create notification for instructor
     if exam.instructor_id:
-        notification_service = NotificationService()
         notification_service.create_notification(
             db=db,
             user_id=exam.instructor_id,
@@ -179,19 +162,15 @@ async def submit_dispute(
         
         # Send email notification to instructor
         # Note: Instructor email is automatically retrieved from their User account (created via signup)
-        from app.services.email_service import EmailService
-        from app.db.models import Student, User as UserModel
-        from app.db.repo import QuestionRepository
-        
         # Get instructor email from their User account (email is stored during signup)
-        instructor = db.query(UserModel).filter(UserModel.id == exam.instructor_id).first()
+        instructor = db.get(User, exam.instructor_id)
         if instructor and instructor.email:
             # Get student name
             student_name = "Student"
             if exam.student_id:
-                student = db.query(Student).filter(Student.id == exam.student_id).first()
+                student = db.get(Student, exam.student_id)
                 if student:
-                    student_user = db.query(UserModel).filter(UserModel.email == student.username).first()
+                    student_user = get_user_by_email_cached(db, student.username)
                     if student_user:
                         student_name = f"{student_user.first_name} {student_user.last_name}".strip() or student.username
                     else:
@@ -201,7 +180,7 @@ async def submit_dispute(
             questions = QuestionRepository.get_by_exam(db, exam.id)
             
             # Generate exam details HTML
-            email_service = EmailService()
+            email_service = get_email_service()
             exam_details_html = email_service.generate_exam_details_html(
                 exam=exam,
                 student_name=student_name,
@@ -1,50 +1,42 @@
 """Notification routes."""
+from typing import Optional
 from fastapi import APIRouter, Depends, Request, HTTPException
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, JSONResponse
 from sqlalchemy.orm import Session
 from app.db.session import get_db
-from app.db.models import User, Notification
-from app.services.notification_service import NotificationService
+from app.db.models import Exam
+from app.services.notification_service import notification_service
+from app.services.auth_service import SessionUser
+from app.api.deps import current_user
+from app.api.responses import LOGIN_REQUIRED_REDIRECT
 
 router = APIRouter()
 
 
 @router.get("/notification/{notification_id}/read")
-async def mark_notification_read(
+def mark_notification_read(
     request: Request,
     notification_id: int,
     redirect: str = "/student/dashboard",
+    user: Optional[SessionUser] = Depends(current_user),
     db: Session = Depends(get_db)
 ):
     """Mark a notification as read."""
-    from app.db.models import Exam
     
-    # Get user from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    user = db.query(User).filter(User.email == email).first()
+    # User comes from the signed session cookie
     if not user:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+        return LOGIN_REQUIRED_REDIRECT
     
-    notification_service = NotificationService()
     
-    # Get notification to check its type and related exam
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == user.id
-    ).first()
+    # Mark as read; returns the notification's type and related exam
+    notification = notification_service.mark_as_read(db, notification_id, user.id)
     
     if not notification:
         return RedirectResponse(url=f"{redirect}?error=Notification not found", status_code=302)
     
-    # Mark as read
-    notification_service.mark_as_read(db, notification_id, user.id)
-    
     # If it's a grade dispute notification and has a related exam, redirect to exam details
     if notification.notification_type == "grade_disputed" and notification.related_exam_id:
-        exam = db.query(Exam).filter(Exam.id == notification.related_exam_id).first()
+        exam = db.get(Exam, notification.related_exam_id)
         if exam:
             # Redirect to exam details page using exam_id string
             if user.role == "teacher":
@@ -57,21 +49,16 @@ async def mark_notification_read(
 
 
 @router.post("/notifications/mark-all-read")
-async def mark_all_notifications_read(
+def mark_all_notifications_read(
     request: Request,
+    user: Optional[SessionUser] = Depends(current_user),
     db: Session = Depends(get_db)
 ):
     """Mark all notifications as read for the current user."""
-    # Get user from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    user = db.query(User).filter(User.email == email).first()
+    # User comes from the signed session cookie
     if not user:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+        return LOGIN_REQUIRED_REDIRECT
     
-    notification_service = NotificationService()
     count = notification_service.mark_all_as_read(db, user.id)
     
     # Determine redirect based on user role
@@ -84,30 +71,21 @@ async def mark_all_notifications_read(
 
 
 @router.delete("/notification/{notification_id}")
-async def delete_notification(
+def delete_notification(
     request: Request,
     notification_id: int,
+    user: Optional[SessionUser] = Depends(current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a notification."""
-    from fastapi.responses import JSONResponse
-    
-    # Get user from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return JSONResponse(
-            status_code=401,
-            content={"success": False, "error": "Login required"}
-        )
     
-    user = db.query(User).filter(User.email == email).first()
+    # User comes from the signed session cookie
     if not user:
         return JSONResponse(
             status_code=401,
             content={"success": False, "error": "Login required"}
         )
     
-    notification_service = NotificationService()
     success = notification_service.delete_notification(db, notification_id, user.id)
     
     if success:
@@ -0,0 +1,22 @@
+"""Prebuilt responses for fixed redirect targets."""
+from fastapi.responses import RedirectResponse
+
+
+class SharedRedirectResponse(RedirectResponse):
+    """A redirect built once at import and returned from many requests.
+    
+    The body and headers never change, so handlers can return the same
+    instance instead of constructing a new response each time. Middleware
+    may edit a response's header list in place, so every send gets its own
+    copy of the prebuilt headers.
+    """
+    
+    async def __call__(self, scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": list(self.raw_headers)})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+LOGIN_REQUIRED_REDIRECT = SharedRedirectResponse(url="/?error=login_required", status_code=302)
+EXAM_NOT_FOUND_REDIRECT = SharedRedirectResponse(url="/teacher/dashboard?error=exam_not_found", status_code=302)
+STUDENT_EXAM_NOT_FOUND_REDIRECT = SharedRedirectResponse(url="/student/dashboard?error=exam_not_found", status_code=302)
+LOGIN_PAGE_REDIRECT = SharedRedirectResponse(url="/", status_code=302)
@@ -0,0 +1,140 @@
+"""Small in-process caches shared by request handlers."""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import orjson
+
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire after ``ttl`` seconds.
+
+    Once ``maxsize`` entries are stored the least recently used one is
+    evicted. Sync route handlers run in a threadpool, hence the lock.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the cached value for ``key`` or ``default`` if missing/expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store ``value`` under ``key`` for ``ttl`` seconds."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Drop ``key`` from the cache if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._data.clear()
+
+
+class RecentSet:
+    """Set that remembers only its ``maxsize`` most recently added members.
+    
+    Adding beyond ``maxsize`` forgets the oldest member, so a long-lived
+    owner's memory stays bounded. Not locked: meant for state used from the
+    event loop only.
+    """
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def add(self, item: Hashable) -> None:
+        """Add ``item``, or mark it most recent if already present."""
+        self._data[item] = None
+        self._data.move_to_end(item)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteTTLCache:
+    """TTL cache of JSON values stored in a SQLite file.
+    
+    Entries survive restarts and are shared by every worker process that
+    opens the same file. Same ``get``/``set`` interface as ``TTLCache``, but
+    keys must be strings and values JSON-serializable. Calls block on disk
+    I/O and the file lock, so async code should run them in a worker thread.
+    """
+
+    def __init__(self, path: str, ttl: float = 300.0, prune_interval: float = 60.0):
+        self.path = path
+        self.ttl = ttl
+        self.prune_interval = prune_interval
+        self._next_prune = 0.0
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value BLOB NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, default: Optional[Any] = None) -> Any:
+        """Return the cached value for ``key`` or ``default`` if missing/expired."""
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return default if row is None else orjson.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Store ``value`` under ``key`` for ``ttl`` seconds.
+        
+        Expired entries are pruned at most once per ``prune_interval``.
+        """
+        now = time.time()
+        with self._connection() as conn:
+            if now >= self._next_prune:
+                self._next_prune = now + self.prune_interval
+                conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, now + self.ttl, orjson.dumps(value))
+            )
+
+    def delete(self, key: str) -> None:
+        """Drop ``key`` from the cache if present."""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache")
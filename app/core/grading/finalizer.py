@@ -60,7 +60,7 @@ Respond in JSON format:
         system_prompt = "You are an expert evaluator calculating final exam grades. Be fair and comprehensive. Always respond with valid JSON."
         
         try:
-            response_dict = await self.llm_client.generate_json(prompt, system_prompt)
+            response_dict = await self.llm_client.generate_json(prompt, system_prompt, cache_schema=FinalGrade)
             result = validate_response(response_dict, FinalGrade)
             
             if not result:
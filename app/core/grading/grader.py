@@ -65,7 +65,7 @@ Do not include any notes or text outside the JSON object."""
         system_prompt = "You are an expert grader evaluating student exam answers. Be fair and constructive. Always respond with valid JSON."
         
         try:
-            response_dict = await self.llm_client.generate_json(prompt, system_prompt)
+            response_dict = await self.llm_client.generate_json(prompt, system_prompt, cache_schema=GradingResult)
             result = validate_response(response_dict, GradingResult)
             
             if not result:
@@ -1,26 +1,70 @@
 """LLM client using Together.ai for JSON-based prompts."""
 import json
+import orjson
 import asyncio
+import hashlib
+import anyio.to_thread
 import logging
-from typing import Optional
-from together import Together
+from typing import Optional, Type
+from pydantic import BaseModel, ValidationError
+from together import AsyncTogether
+from app.core.cache import SQLiteTTLCache, TTLCache
 from app.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Parsed responses keyed by a hash of the full request, shared by every client;
+# kept on disk when llm_cache_path is set so workers share it across restarts
+_response_cache = (
+    SQLiteTTLCache(get_settings().llm_cache_path, ttl=3600)
+    if get_settings().llm_cache_path else TTLCache(maxsize=1024, ttl=3600)
+)
+# The on-disk cache blocks on file I/O and locks shared with other workers,
+# so its calls run in a worker thread instead of on the event loop
+_cache_blocks = isinstance(_response_cache, SQLiteTTLCache)
+
+_json_decoder = json.JSONDecoder()
+
+
+def _extract_json(text: str):
+    """Parse the JSON object in an LLM response.
+    
+    Most responses are a bare JSON object and parse directly. When the model
+    wraps it in explanatory text, the object starting at the first brace is
+    decoded and anything after it is ignored.
+    
+    Raises:
+        json.JSONDecodeError: If no JSON object can be parsed.
+    """
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        first_brace = text.find('{')
+        if first_brace == -1:
+            raise
+        return _json_decoder.raw_decode(text, first_brace)[0]
+
+
+def _is_valid(response, schema: Type[BaseModel]) -> bool:
+    """Whether a parsed response satisfies the schema its caller will validate it against."""
+    try:
+        schema.model_validate(response)
+    except ValidationError:
+        return False
+    return True
+
+
 class LLMClient:
     """Client to interact with an LLM via Together.ai."""
 
     def __init__(self):
         """Initialize LLM client. Together client is created lazily only when needed."""
         self.model = None
-        self._client: Optional[Together] = None
+        self._client: Optional[AsyncTogether] = None
         self._client_api_key: Optional[str] = None  # Track which API key was used for client
     
     def _get_settings(self):
-        """Get fresh settings (always reads from .env file, respecting cache clearing)."""
-        # Clear cache to ensure we get latest from .env file
-        get_settings.cache_clear()
+        """Get the cached application settings."""
         return get_settings()
     
     def _get_api_key(self) -> str:
@@ -35,8 +79,12 @@ class LLMClient:
             self.model = settings.llm_model
         return self.model
     
-    def _get_client(self) -> Together:
-        """Lazily initialize and return the Together client."""
+    def _get_client(self) -> AsyncTogether:
+        """Lazily initialize and return the async Together client.
+        
+        Requests are awaited on the event loop rather than run in a worker
+        thread, so concurrent calls aren't capped by the threadpool size.
+        """
         api_key = self._get_api_key()
         
         # Recreate client if API key changed
@@ -47,17 +95,25 @@ class LLMClient:
                     "Set it as an environment variable or in .env file to use LLM features. "
                     "The app will use fallback questions/grading when the API key is missing."
                 )
-            self._client = Together(api_key=api_key)
+            self._client = AsyncTogether(api_key=api_key)
             self._client_api_key = api_key
         return self._client
 
-    async def generate_json(self, prompt: str, system_prompt: str = None) -> dict:
+    async def generate_json(self, prompt: str, system_prompt: str = None,
+                            cache_schema: Optional[Type[BaseModel]] = None) -> dict:
         """
         Generate a JSON response from the LLM.
 
         Args:
             prompt (str): The user prompt.
             system_prompt (str, optional): System-level instructions.
+            cache_schema (Type[BaseModel], optional): Reuse the response of an
+                identical earlier request (same messages, model, temperature
+                and max tokens). A response is only cached once it validates
+                against this schema, so a malformed one is retried next time.
+                Only for callers that want the same answer back for the same
+                input, such as grading; generation that relies on sampling
+                variety must leave it unset.
 
         Returns:
             dict: Parsed JSON response from the LLM.
@@ -77,53 +133,69 @@ class LLMClient:
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
+        
+        model = self._get_model()
+        settings = self._get_settings()
+        temperature = settings.llm_temperature
+        max_tokens = settings.llm_max_tokens
+        # JSON mode makes the API return a bare JSON object, so the cleanup
+        # below is only needed for models without it
+        extra_options = {"response_format": {"type": "json_object"}} if settings.llm_json_mode else {}
+        
+        cache_key = None
+        if cache_schema is not None:
+            cache_key = hashlib.sha256(orjson.dumps([messages, model, temperature, max_tokens], option=orjson.OPT_SORT_KEYS)).hexdigest()
+            if _cache_blocks:
+                cached = await anyio.to_thread.run_sync(_response_cache.get, cache_key)
+            else:
+                cached = _response_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("LLM response served from cache")
+                return cached
 
-        # Together SDK is synchronous, wrap in async
-        loop = asyncio.get_event_loop()
-
-        def call_llm_with_retry():
-            # Simple retry for temporary server issues (503)
-            client = self._get_client()
-            model = self._get_model()
-            settings = self._get_settings()
-            temperature = settings.llm_temperature
-            max_tokens = settings.llm_max_tokens
-            logger.info(f"Calling LLM API - Model: {model}, Temperature: {temperature}, Max tokens: {max_tokens}, API Key present: {bool(api_key)}")
-            last_error = None
-            for attempt in range(3):
-                try:
-                    logger.debug(f"LLM API call attempt {attempt + 1}/3")
-                    response = client.chat.completions.create(
-                        model=model,
-                        messages=messages,
-                        temperature=temperature,
-                        max_tokens=max_tokens
-                    )
-                    content = response.choices[0].message.content
-                    logger.info(f"LLM API call successful. Response length: {len(content)} characters")
-                    logger.debug(f"LLM response preview (first 500 chars): {content[:500]}")
-                    return content
-                except Exception as e:
-                    last_error = e
-                    error_type = type(e).__name__
-                    error_msg = str(e)
-                    logger.error(f"LLM API call failed on attempt {attempt + 1}/3 - Type: {error_type}, Error: {error_msg}")
-                    if hasattr(e, 'status_code'):
-                        logger.error(f"HTTP Status Code: {e.status_code}")
-                    if hasattr(e, 'response'):
-                        logger.error(f"Response details: {e.response}")
+        # Simple retry for temporary server issues (503)
+        client = self._get_client()
+        logger.info(f"Calling LLM API - Model: {model}, Temperature: {temperature}, Max tokens: {max_tokens}, API Key present: {bool(api_key)}")
+        last_error = None
+        result_text = None
+        for attempt in range(3):
+            try:
+                logger.debug("LLM API call attempt %d/3", attempt + 1)
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **extra_options
+                )
+                result_text = response.choices[0].message.content
+                logger.info(f"LLM API call successful. Response length: {len(result_text)} characters")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("LLM response preview (first 500 chars): %s", result_text[:500])
+                break
+            except Exception as e:
+                last_error = e
+                error_type = type(e).__name__
+                error_msg = str(e)
+                logger.error(f"LLM API call failed on attempt {attempt + 1}/3 - Type: {error_type}, Error: {error_msg}")
+                if hasattr(e, 'status_code'):
+                    logger.error(f"HTTP Status Code: {e.status_code}")
+                if hasattr(e, 'response'):
+                    logger.error(f"Response details: {e.response}")
+                if attempt < 2:
+                    # Back off before retrying so a briefly overloaded server can recover
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+        if result_text is None:
             # If all retries fail
             error_summary = f"LLM request failed after 3 attempts. Last error: {type(last_error).__name__}: {str(last_error)}"
             logger.error(error_summary)
             raise RuntimeError(error_summary) from last_error
 
-        result_text = await loop.run_in_executor(None, call_llm_with_retry)
-
         # Clean up response - extract JSON even if there's text before/after
         cleaned_text = result_text.strip()
         
         # Remove markdown code fences if present
-        if cleaned_text.startswith("```"):
+        if not settings.llm_json_mode and cleaned_text.startswith("```"):
             # Remove opening code fence (```json or ```)
             cleaned_text = cleaned_text.split("\n", 1)[1] if "\n" in cleaned_text else cleaned_text[3:]
             # Remove closing code fence
@@ -131,30 +203,16 @@ class LLMClient:
                 cleaned_text = cleaned_text[:-3]
             cleaned_text = cleaned_text.strip()
         
-        # Try to find JSON object in the response (in case there's explanatory text)
-        # Look for the first { and last } to extract JSON
-        first_brace = cleaned_text.find('{')
-        if first_brace != -1:
-            # Find the matching closing brace
-            brace_count = 0
-            last_brace = -1
-            for i in range(first_brace, len(cleaned_text)):
-                if cleaned_text[i] == '{':
-                    brace_count += 1
-                elif cleaned_text[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        last_brace = i
-                        break
-            
-            if last_brace != -1:
-                # Extract the JSON portion
-                cleaned_text = cleaned_text[first_brace:last_brace + 1]
-        
         # Attempt to parse JSON
         try:
-            parsed_json = json.loads(cleaned_text)
-            logger.debug(f"Successfully parsed JSON. Keys: {list(parsed_json.keys()) if isinstance(parsed_json, dict) else 'N/A'}")
+            parsed_json = _extract_json(cleaned_text)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Successfully parsed JSON. Keys: %s", list(parsed_json.keys()) if isinstance(parsed_json, dict) else 'N/A')
+            if cache_key is not None and _is_valid(parsed_json, cache_schema):
+                if _cache_blocks:
+                    await anyio.to_thread.run_sync(_response_cache.set, cache_key, parsed_json)
+                else:
+                    _response_cache.set(cache_key, parsed_json)
             return parsed_json
         except json.JSONDecodeError as e:
             # Provide comprehensive debugging info if JSON is invalid
@@ -164,7 +222,7 @@ class LLMClient:
             logger.error(f"Cleaned text preview (first 1000 chars): {cleaned_text[:1000]}")
             logger.error(f"Original response length: {len(result_text)} characters")
             logger.error(f"Original response preview (first 1000 chars): {result_text[:1000]}")
-            logger.error(f"First brace position: {first_brace}, Last brace position: {last_brace if 'last_brace' in locals() else 'N/A'}")
+            logger.error(f"First brace position: {cleaned_text.find('{')}")
             raise json.JSONDecodeError(
                 f"Failed to parse LLM response as JSON: {str(e)}. Response preview: {result_text[:500]}",
                 e.doc,
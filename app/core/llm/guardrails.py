@@ -16,7 +16,8 @@ def validate_response(response_dict: dict, schema: Type[T]) -> Optional[T]:
         logger.error(f"Validation error: {e}")
         logger.error(f"Response dict: {response_dict}")
         return None
-    except Exception as e:
+    except TypeError as e:
+        # response_dict wasn't a mapping of field names
         logger.error(f"Unexpected error during validation: {e}")
         return None
 
@@ -1,9 +1,20 @@
 """Pydantic schemas for API request/response models."""
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, BeforeValidator
+from typing import Annotated, Optional, List
 from datetime import datetime
 
 
+def _blank_to_none(value):
+    """Treat an empty or whitespace-only form field as missing."""
+    if isinstance(value, str) and not value.strip():
+        return None
+    return value
+
+
+# Optional numeric form field; blank inputs parse to None instead of failing
+OptionalFormFloat = Annotated[Optional[float], BeforeValidator(_blank_to_none)]
+
+
 class LoginRequest(BaseModel):
     """Login request model."""
     username: str
@@ -1,13 +1,31 @@
 """Pydantic schemas for LLM response contracts."""
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 
 
+def rubric_to_text(value):
+    """Flatten a {criterion: points} rubric dict into the stored string form.
+    
+    LLMs sometimes return the rubric as a dictionary despite being asked for a
+    string. Normalizing here means it is converted once, when the response is
+    validated, and Question.rubric is always plain text by the time it is saved.
+    """
+    if not isinstance(value, dict):
+        return value
+    rubric_parts = [f"{key}: {points} points" for key, points in value.items()]
+    rubric = "Grading criteria: " + ", ".join(rubric_parts) + "."
+    if all(isinstance(points, (int, float)) for points in value.values()):
+        rubric += " Total: " + str(sum(value.values())) + " points."
+    return rubric
+
+
 class GeneratedQuestion(BaseModel):
     """Schema for generated question response."""
     question_text: str = Field(..., description="The exam question text")
     context: str = Field(..., description="Background context for the question")
     rubric: str = Field(..., description="Grading rubric for this question")
+    
+    _normalize_rubric = field_validator("rubric", mode="before")(rubric_to_text)
 
 
 class GeneratedQuestionWithNumber(BaseModel):
@@ -16,6 +34,8 @@ class GeneratedQuestionWithNumber(BaseModel):
     question_text: str = Field(..., description="The exam question text")
     context: str = Field(..., description="Background context for the question")
     rubric: str = Field(..., description="Grading rubric for this question")
+    
+    _normalize_rubric = field_validator("rubric", mode="before")(rubric_to_text)
 
 
 class GeneratedExam(BaseModel):
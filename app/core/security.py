@@ -0,0 +1,69 @@
+"""Signed session tokens for the login cookie."""
+import base64
+import hashlib
+import hmac
+import time
+import orjson
+from typing import Optional
+from app.settings import DEFAULT_SECRET_KEY, get_settings
+
+SESSION_COOKIE = "session"
+SESSION_MAX_AGE = 12 * 60 * 60  # seconds
+
+
+def check_secret_key() -> None:
+    """Refuse to run outside development with the publicly known default key.
+    
+    The session cookie is the only source of a request's user id and role,
+    so anyone holding the key can sign in as any user.
+    """
+    settings = get_settings()
+    if settings.environment != "development" and settings.secret_key == DEFAULT_SECRET_KEY:
+        raise RuntimeError(
+            "SECRET_KEY is still the default value. Set SECRET_KEY to a long random "
+            "string in the environment or .env file before running outside development."
+        )
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    key = get_settings().secret_key.encode("utf-8")
+    return _b64encode(hmac.new(key, payload.encode("utf-8"), hashlib.sha256).digest())
+
+
+def create_session_token(user_id: int, email: str, role: str, first_name: str = "", last_name: str = "",
+                         max_age: int = SESSION_MAX_AGE) -> str:
+    """Create an HMAC-signed token identifying a logged-in user."""
+    claims = {
+        "uid": user_id,
+        "email": email,
+        "role": role,
+        "fn": first_name,
+        "ln": last_name,
+        "exp": int(time.time()) + max_age
+    }
+    payload = _b64encode(orjson.dumps(claims))
+    return f"{payload}.{_sign(payload)}"
+
+
+def decode_session_token(token: str) -> Optional[dict]:
+    """Return the token's claims, or None if it is malformed, tampered with or expired."""
+    if not token or "." not in token:
+        return None
+    payload, signature = token.rsplit(".", 1)
+    if not hmac.compare_digest(signature.encode("utf-8"), _sign(payload).encode("utf-8")):
+        return None
+    try:
+        claims = orjson.loads(_b64decode(payload))
+    except (ValueError, orjson.JSONDecodeError):
+        return None
+    if not isinstance(claims, dict) or claims.get("exp", 0) < time.time():
+        return None
+    return claims
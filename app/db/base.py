@@ -1,17 +1,62 @@
 """Database base configuration."""
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from app.settings import get_settings
 
 settings = get_settings()
 
+# Pool sizing only applies to file/server databases. An in-memory SQLite
+# database lives and dies with its connection, so every thread shares one.
+pool_options = {"poolclass": StaticPool} if ":memory:" in settings.database_url else {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+    "pool_recycle": settings.db_pool_recycle,
+    "pool_pre_ping": True,
+}
+
 engine = create_engine(
     settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
+    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
+    **pool_options
 )
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Tune each new SQLite connection for a write-heavy, concurrent workload.
+        
+        WAL lets readers proceed during a write and, with synchronous=NORMAL,
+        commits skip the per-transaction fsync. The page cache is raised to
+        64MB, temporary sort tables stay in memory and foreign keys are
+        enforced as declared on the models.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        # Bound the work PRAGMA optimize may do when it re-analyzes a table
+        cursor.execute("PRAGMA analysis_limit=400")
+        cursor.close()
+    
+    @event.listens_for(engine, "close")
+    def _optimize_sqlite_on_close(dbapi_connection, connection_record):
+        """Refresh planner statistics gathered by this connection before it closes."""
+        dbapi_connection.execute("PRAGMA optimize")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def optimize_database():
+    """Let SQLite refresh stale planner statistics, e.g. after new indexes or data growth."""
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA optimize")
+
 Base = declarative_base()
 
@@ -1,11 +1,22 @@
 """Script to fix student_id column in exams table to be nullable."""
-from app.db.session import SessionLocal
+import traceback
+from app.db.base import engine
 from sqlalchemy import text
+from sqlalchemy.orm import Session
 
 
 def fix_student_id_nullable():
-    """Make student_id nullable in exams table."""
-    db = SessionLocal()
+    """Make student_id nullable in exams table.
+    
+    Foreign key enforcement is switched off for the rebuild: dropping the old
+    exams table would otherwise fail while questions or notifications still
+    reference it. The pragma has no effect inside a transaction, so it is set
+    on the connection before the session begins one.
+    """
+    connection = engine.connect()
+    connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+    connection.commit()
+    db = Session(bind=connection)
     
     try:
         print("=" * 80)
@@ -148,6 +159,16 @@ def fix_student_id_nullable():
             except Exception as e:
                 print(f"    [!] Index {idx_name} may already exist or error: {e}")
         
+        # Step 6: Make sure the rebuilt table still satisfies every foreign key
+        print("\n[+] Checking foreign keys...")
+        violations = db.execute(text("PRAGMA foreign_key_check")).fetchall()
+        if violations:
+            print(f"    [!] {len(violations)} foreign key violation(s) found:")
+            for table, rowid, parent, _ in violations:
+                print(f"        {table} row {rowid} references a missing {parent} row")
+        else:
+            print("    [OK] No foreign key violations")
+        
         print("\n[SUCCESS] Migration complete!")
         print("student_id is now nullable in the exams table.")
         print("=" * 80)
@@ -155,10 +176,12 @@ def fix_student_id_nullable():
     except Exception as e:
         print(f"\n[ERROR] Error during migration: {e}")
         db.rollback()
-        import traceback
         traceback.print_exc()
     finally:
         db.close()
+        connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+        connection.commit()
+        connection.close()
 
 
 if __name__ == "__main__":
@@ -1,13 +1,38 @@
 """Database initialization script."""
+import argparse
 import logging
 from app.db.base import Base, engine
 from app.logging_config import setup_logging
 
+# Import models to ensure they're registered
+from app.db import models  # noqa: F401
+
 setup_logging()
 logger = logging.getLogger(__name__)
 
+
+def init_db(force: bool = False):
+    """Create any missing tables, all in one transaction.
+
+    With ``force`` every table is dropped first, deleting all data.
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            # The sqlite3 driver doesn't open a transaction for DDL on its own.
+            # IMMEDIATE takes the write lock before the tables are checked, so
+            # processes starting together create the schema once between them.
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        if force:
+            logger.warning("Dropping all database tables...")
+            Base.metadata.drop_all(bind=conn)
+        Base.metadata.create_all(bind=conn)
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the database tables.")
+    parser.add_argument("--force", action="store_true", help="drop all tables (and their data) before creating them")
+    args = parser.parse_args()
+
     logger.info("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    init_db(force=args.force)
     logger.info("Database tables created successfully!")
-
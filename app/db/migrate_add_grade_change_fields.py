@@ -1,6 +1,8 @@
 """Migration script to add grade_change_reason and grade_changed_by columns to exams table."""
 from app.db.session import SessionLocal
 from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.db.schema_migrations import is_applied, mark_applied
 
 
 def migrate():
@@ -11,6 +13,11 @@ def migrate():
         print("=" * 80)
         print("MIGRATING EXAMS TABLE - Adding Grade Change Fields")
         print("=" * 80)
+        
+        if is_applied(db, "add_grade_change_fields"):
+            print("\n[-] Migration already applied, nothing to do")
+            return
+        
         print("\nAdding new columns to exams table...")
         
         migrations = [
@@ -18,23 +25,43 @@ def migrate():
             ("grade_changed_by", "INTEGER")
         ]
         
-        for column_name, column_def in migrations:
+        # Work out the full ALTER TABLE script before touching the schema;
+        # columns that already exist are reported by SQLite and skipped
+        statements = [
+            (column_name, f"ALTER TABLE exams ADD COLUMN {column_name} {column_def}")
+            for column_name, column_def in migrations
+        ]
+        
+        # Add every column in one transaction so SQLite syncs the journal once;
+        # the sqlite3 driver doesn't open one for DDL on its own. Each ALTER
+        # gets a savepoint so one failure doesn't undo the rest, and goes
+        # straight to the driver since there is nothing to compile.
+        db.execute(text("BEGIN"))
+        connection = db.connection()
+        failed = False
+        
+        for column_name, statement in statements:
+            savepoint = db.begin_nested()
             try:
-                # Check if column exists first
-                result = db.execute(text(
-                    f"SELECT COUNT(*) as count FROM pragma_table_info('exams') WHERE name='{column_name}'"
-                ))
-                exists = result.fetchone()[0] > 0
-                
-                if not exists:
-                    print(f"  [+] Adding column: {column_name}")
-                    db.execute(text(f"ALTER TABLE exams ADD COLUMN {column_name} {column_def}"))
-                    db.commit()
-                else:
+                connection.exec_driver_sql(statement)
+                savepoint.commit()
+                print(f"  [+] Added column: {column_name}")
+            except OperationalError as e:
+                savepoint.rollback()
+                if "duplicate column name" in str(e.orig):
                     print(f"  [-] Column {column_name} already exists, skipping")
+                else:
+                    print(f"  [X] Error adding column {column_name}: {e}")
+                    failed = True
             except Exception as e:
                 print(f"  [X] Error adding column {column_name}: {e}")
-                db.rollback()
+                savepoint.rollback()
+                failed = True
+        
+        # Only a clean run is recorded, so a partial one is retried next time
+        if not failed:
+            mark_applied(db, "add_grade_change_fields")
+        db.commit()
         
         print("\n[SUCCESS] Migration complete!")
         print("\n" + "=" * 80)
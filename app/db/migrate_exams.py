@@ -4,6 +4,8 @@ from app.db.base import Base, engine
 # Import Exam model to ensure it's registered with Base.metadata
 from app.db.models import Exam
 from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.db.schema_migrations import is_applied, mark_applied
 
 
 def migrate_exams_table():
@@ -14,6 +16,11 @@ def migrate_exams_table():
         print("=" * 80)
         print("MIGRATING EXAMS TABLE")
         print("=" * 80)
+        
+        if is_applied(db, "exams"):
+            print("\n[-] Migration already applied, nothing to do")
+            return
+        
         print("\nAdding new columns to exams table...")
         
         # SQLite syntax for adding columns
@@ -31,56 +38,74 @@ def migrate_exams_table():
             ("date_end_availability", "DATETIME")
         ]
         
-        # Check which columns already exist
-        inspector_result = db.execute(text(
-            "SELECT name FROM pragma_table_info('exams')"
-        ))
-        existing_columns = [row[0] for row in inspector_result.fetchall()]
-        
+        # Work out the full ALTER TABLE script before touching the schema;
+        # columns that already exist are reported by SQLite and skipped.
+        # For SQLite, we can't add NOT NULL columns without defaults for existing rows
+        # So we'll add nullable columns first
+        statements = []
         for column_name, column_def in migrations:
-            if column_name in existing_columns:
-                print(f"  [-] Column {column_name} already exists, skipping")
-            else:
-                try:
-                    print(f"  [+] Adding column: {column_name}")
-                    # For SQLite, we can't add NOT NULL columns without defaults for existing rows
-                    # So we'll add nullable columns first
-                    nullable_def = column_def.replace("NOT NULL", "").strip()
-                    if "INTEGER" in nullable_def and "instructor_id" in column_name:
-                        db.execute(text(f"ALTER TABLE exams ADD COLUMN {column_name} INTEGER"))
-                    elif "DATETIME" in nullable_def:
-                        db.execute(text(f"ALTER TABLE exams ADD COLUMN {column_name} DATETIME"))
-                    else:
-                        db.execute(text(f"ALTER TABLE exams ADD COLUMN {column_name} {nullable_def}"))
-                    db.commit()
-                except Exception as e:
+            nullable_def = column_def.replace("NOT NULL", "").strip()
+            if "INTEGER" in nullable_def and "instructor_id" in column_name:
+                nullable_def = "INTEGER"
+            elif "DATETIME" in nullable_def:
+                nullable_def = "DATETIME"
+            statements.append((column_name, f"ALTER TABLE exams ADD COLUMN {column_name} {nullable_def}"))
+        
+        # Run every ALTER and CREATE INDEX in one transaction so SQLite syncs the
+        # journal once; the sqlite3 driver doesn't open one for DDL on its own.
+        # Each statement gets a savepoint so one failure doesn't undo the rest,
+        # and goes straight to the driver since there is nothing to compile.
+        db.execute(text("BEGIN"))
+        connection = db.connection()
+        failed = False
+        
+        for column_name, statement in statements:
+            savepoint = db.begin_nested()
+            try:
+                connection.exec_driver_sql(statement)
+                savepoint.commit()
+                print(f"  [+] Added column: {column_name}")
+            except OperationalError as e:
+                savepoint.rollback()
+                if "duplicate column name" in str(e.orig):
+                    print(f"  [-] Column {column_name} already exists, skipping")
+                else:
                     print(f"  [X] Error adding column {column_name}: {e}")
-                    db.rollback()
+                    failed = True
+            except Exception as e:
+                print(f"  [X] Error adding column {column_name}: {e}")
+                savepoint.rollback()
+                failed = True
         
         # Create index on exam_id if it doesn't exist
+        savepoint = db.begin_nested()
         try:
             indices_result = db.execute(text(
                 "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='exams'"
             ))
-            existing_indices = [row[0] for row in indices_result.fetchall()]
+            existing_indices = {row[0] for row in indices_result.fetchall()}
             
             if 'ix_exams_exam_id' not in existing_indices:
                 print("  [+] Creating index on exam_id")
                 db.execute(text("CREATE INDEX IF NOT EXISTS ix_exams_exam_id ON exams(exam_id)"))
-                db.commit()
             
             if 'ix_exams_course_number' not in existing_indices:
                 print("  [+] Creating index on course_number")
                 db.execute(text("CREATE INDEX IF NOT EXISTS ix_exams_course_number ON exams(course_number)"))
-                db.commit()
                 
             if 'ix_exams_instructor_id' not in existing_indices:
                 print("  [+] Creating index on instructor_id")
                 db.execute(text("CREATE INDEX IF NOT EXISTS ix_exams_instructor_id ON exams(instructor_id)"))
-                db.commit()
+            savepoint.commit()
         except Exception as e:
             print(f"  [X] Error creating indexes: {e}")
-            db.rollback()
+            savepoint.rollback()
+            failed = True
+        
+        # Only a clean run is recorded, so a partial one is retried next time
+        if not failed:
+            mark_applied(db, "exams")
+        db.commit()
         
         print("\n[SUCCESS] Migration complete!")
         print("\nThe exams table has been extended with the following fields:")
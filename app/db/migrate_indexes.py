@@ -0,0 +1,32 @@
+"""Migration script to add composite indexes declared on the models."""
+from app.db.base import Base, engine
+
+# Import models to ensure they're registered
+from app.db import models  # noqa: F401
+
+
+def migrate_indexes():
+    """Create any model indexes missing from an existing database."""
+    try:
+        print("=" * 80)
+        print("MIGRATING - Adding Indexes")
+        print("=" * 80)
+        
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(bind=engine, checkfirst=True)
+                    print(f"  [+] Index {index.name} ready")
+                except Exception as e:
+                    print(f"  [X] Error creating index {index.name}: {e}")
+        
+        print("\n[SUCCESS] Migration complete!")
+        print("\n" + "=" * 80)
+        
+    except Exception as e:
+        print(f"\n[ERROR] Error during migration: {e}")
+        print("\nYou may need to create the indexes manually; see __table_args__ in app/db/models.py.")
+
+
+if __name__ == "__main__":
+    migrate_indexes()
@@ -51,11 +51,10 @@ def migrate_notifications():
         print("\nAdding dispute_reason column to exams table...")
         try:
             result = db.execute(text(
-                "SELECT COUNT(*) as count FROM pragma_table_info('exams') WHERE name='dispute_reason'"
-            ))
-            exists = result.fetchone()[0] > 0
+                "SELECT 1 FROM pragma_table_info('exams') WHERE name = :name LIMIT 1"
+            ), {"name": "dispute_reason"})
             
-            if not exists:
+            if result.first() is None:
                 print("  [+] Adding column: dispute_reason")
                 db.execute(text("ALTER TABLE exams ADD COLUMN dispute_reason TEXT"))
                 db.commit()
@@ -4,6 +4,8 @@ from app.db.base import Base, engine
 # Import Exam model to ensure it's registered with Base.metadata
 from app.db.models import Exam
 from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.db.schema_migrations import is_applied, mark_applied
 
 
 def migrate_timed_exam_fields():
@@ -14,6 +16,11 @@ def migrate_timed_exam_fields():
         print("=" * 80)
         print("MIGRATING EXAMS TABLE - ADDING TIMED EXAM FIELDS")
         print("=" * 80)
+        
+        if is_applied(db, "timed_exams"):
+            print("\n[-] Migration already applied, nothing to do")
+            return
+        
         print("\nAdding timed exam columns to exams table...")
         
         # SQLite syntax for adding columns
@@ -24,34 +31,52 @@ def migrate_timed_exam_fields():
             ("student_exam_start_time", "DATETIME")
         ]
         
-        # Check which columns already exist
-        inspector_result = db.execute(text(
-            "SELECT name FROM pragma_table_info('exams')"
-        ))
-        existing_columns = [row[0] for row in inspector_result.fetchall()]
-        
+        # Work out the full ALTER TABLE script before touching the schema;
+        # columns that already exist are reported by SQLite and skipped.
+        # For SQLite, we can't add NOT NULL columns without defaults for existing rows
+        # So we'll add nullable columns first
+        statements = []
         for column_name, column_def in migrations:
-            if column_name in existing_columns:
-                print(f"  [-] Column {column_name} already exists, skipping")
-            else:
-                try:
-                    print(f"  [+] Adding column: {column_name}")
-                    # For SQLite, we can't add NOT NULL columns without defaults for existing rows
-                    # So we'll add nullable columns first
-                    nullable_def = column_def.replace("NOT NULL", "").strip()
-                    if "BOOLEAN" in nullable_def:
-                        # SQLite doesn't have native BOOLEAN, use INTEGER (0 or 1)
-                        db.execute(text(f"ALTER TABLE exams ADD COLUMN {column_name} INTEGER DEFAULT 0"))
-                    elif "INTEGER" in nullable_def:
-                        db.execute(text(f"ALTER TABLE exams ADD COLUMN {column_name} INTEGER"))
-                    elif "DATETIME" in nullable_def:
-                        db.execute(text(f"ALTER TABLE exams ADD COLUMN {column_name} DATETIME"))
-                    else:
-                        db.execute(text(f"ALTER TABLE exams ADD COLUMN {column_name} {nullable_def}"))
-                    db.commit()
-                except Exception as e:
+            nullable_def = column_def.replace("NOT NULL", "").strip()
+            if "BOOLEAN" in nullable_def:
+                # SQLite doesn't have native BOOLEAN, use INTEGER (0 or 1)
+                nullable_def = "INTEGER DEFAULT 0"
+            elif "INTEGER" in nullable_def:
+                nullable_def = "INTEGER"
+            elif "DATETIME" in nullable_def:
+                nullable_def = "DATETIME"
+            statements.append((column_name, f"ALTER TABLE exams ADD COLUMN {column_name} {nullable_def}"))
+        
+        # Add every column in one transaction so SQLite syncs the journal once;
+        # the sqlite3 driver doesn't open one for DDL on its own. Each ALTER
+        # gets a savepoint so one failure doesn't undo the rest, and goes
+        # straight to the driver since there is nothing to compile.
+        db.execute(text("BEGIN"))
+        connection = db.connection()
+        failed = False
+        
+        for column_name, statement in statements:
+            savepoint = db.begin_nested()
+            try:
+                connection.exec_driver_sql(statement)
+                savepoint.commit()
+                print(f"  [+] Added column: {column_name}")
+            except OperationalError as e:
+                savepoint.rollback()
+                if "duplicate column name" in str(e.orig):
+                    print(f"  [-] Column {column_name} already exists, skipping")
+                else:
                     print(f"  [X] Error adding column {column_name}: {e}")
-                    db.rollback()
+                    failed = True
+            except Exception as e:
+                print(f"  [X] Error adding column {column_name}: {e}")
+                savepoint.rollback()
+                failed = True
+        
+        # Only a clean run is recorded, so a partial one is retried next time
+        if not failed:
+            mark_applied(db, "timed_exams")
+        db.commit()
         
         print("\n[SUCCESS] Migration complete!")
         print("\nThe exams table has been extended with the following fields:")
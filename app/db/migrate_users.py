@@ -22,20 +22,26 @@ def migrate_users_table():
             ("instructor_id", "TEXT")
         ]
         
+        # Check which columns already exist
+        inspector_result = db.execute(text(
+            "SELECT name FROM pragma_table_info('users')"
+        ))
+        existing_columns = {row[0] for row in inspector_result.fetchall()}
+        
+        # Work out the full ALTER TABLE script before touching the schema
+        statements = []
         for column_name, column_def in migrations:
+            if column_name in existing_columns:
+                print(f"  [-] Column {column_name} already exists, skipping")
+            else:
+                statements.append((column_name, f"ALTER TABLE users ADD COLUMN {column_name} {column_def}"))
+        
+        # The statements are plain DDL, so they go straight to the driver
+        for column_name, statement in statements:
             try:
-                # Check if column exists first
-                result = db.execute(text(
-                    f"SELECT COUNT(*) as count FROM pragma_table_info('users') WHERE name='{column_name}'"
-                ))
-                exists = result.fetchone()[0] > 0
-                
-                if not exists:
-                    print(f"  [+] Adding column: {column_name}")
-                    db.execute(text(f"ALTER TABLE users ADD COLUMN {column_name} {column_def}"))
-                    db.commit()
-                else:
-                    print(f"  [-] Column {column_name} already exists, skipping")
+                print(f"  [+] Adding column: {column_name}")
+                db.connection().exec_driver_sql(statement)
+                db.commit()
             except Exception as e:
                 print(f"  [X] Error adding column {column_name}: {e}")
                 db.rollback()
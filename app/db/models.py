@@ -1,5 +1,5 @@
 """Database models."""
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -61,7 +61,7 @@ class Exam(Base):
     student_exam_start_time = Column(DateTime(timezone=True), nullable=True)  # When student started the exam
     
     # Student exam session fields (existing)
-    student_id = Column(Integer, ForeignKey("students.id"), nullable=True)  # Nullable for teacher-created exams
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=True, index=True)  # Nullable for teacher-created exams
     status = Column(String(50), default="in_progress")  # in_progress, completed, active, not_started, disputed
     dispute_reason = Column(Text, nullable=True)  # Student's reason for disputing grade
     grade_change_reason = Column(Text, nullable=True)  # Instructor's reason for changing grade
@@ -72,7 +72,16 @@ class Exam(Base):
     completed_at = Column(DateTime(timezone=True), nullable=True)
     
     student = relationship("Student", back_populates="exams")
-    questions = relationship("Question", back_populates="exam")
+    questions = relationship("Question", back_populates="exam", order_by="Question.question_number")
+    
+    # Teacher pages list an instructor's exams newest first, by creation or publish date.
+    # An exam offering (course, name, quarter, section) is looked up to find its
+    # sibling sections and each student's copy of it.
+    __table_args__ = (
+        Index('ix_exams_instructor_created', instructor_id, created_at.desc()),
+        Index('ix_exams_instructor_published', instructor_id, date_published.desc()),
+        Index('ix_exams_offering', course_number, exam_name, quarter_year, section),
+    )
 
 
 class Question(Base):
@@ -92,6 +101,11 @@ class Question(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     exam = relationship("Exam", back_populates="questions")
+    
+    # Questions are always fetched per exam in question order
+    __table_args__ = (
+        Index('ix_questions_exam_number', exam_id, question_number),
+    )
 
 
 class Course(Base):
@@ -152,4 +166,15 @@ class Notification(Base):
     user = relationship("User", back_populates="notifications")
     related_exam = relationship("Exam")
     related_course = relationship("Course")
+    
+    # Inbox listing, unread counts and mark-all-read all filter on (user_id, is_read)
+    # and order by newest first; on PostgreSQL the index also covers the columns
+    # read back when a notification is opened.
+    __table_args__ = (
+        Index(
+            'ix_notifications_user_unread',
+            user_id, is_read, created_at.desc(),
+            postgresql_include=['notification_type', 'related_exam_id']
+        ),
+    )
 
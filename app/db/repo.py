@@ -1,7 +1,9 @@
 """Database repository for CRUD operations."""
-from sqlalchemy.orm import Session
-from typing import Optional, List
-from app.db.models import Student, Exam, Question
+from sqlalchemy import delete, func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, joinedload
+from typing import Optional, List, Tuple
+from app.db.models import Student, Exam, Question, Enrollment
 
 
 class StudentRepository:
@@ -34,12 +36,17 @@ class ExamRepository:
     @staticmethod
     def get(db: Session, exam_id: int) -> Optional[Exam]:
         """Get exam by ID."""
-        return db.query(Exam).filter(Exam.id == exam_id).first()
+        return db.get(Exam, exam_id)
+    
+    @staticmethod
+    def get_with_questions(db: Session, exam_id: int) -> Optional[Exam]:
+        """Get exam by ID with its questions (ordered by number) in a single JOIN."""
+        return db.query(Exam).options(joinedload(Exam.questions)).filter(Exam.id == exam_id).first()
     
     @staticmethod
     def update_status(db: Session, exam_id: int, status: str, final_grade: Optional[float] = None, final_explanation: Optional[str] = None):
         """Update exam status and final grade."""
-        exam = db.query(Exam).filter(Exam.id == exam_id).first()
+        exam = db.get(Exam, exam_id)
         if exam:
             exam.status = status
             if final_grade is not None:
@@ -47,7 +54,6 @@ class ExamRepository:
             if final_explanation:
                 exam.final_explanation = final_explanation
             db.commit()
-            db.refresh(exam)
         return exam
 
 
@@ -71,20 +77,58 @@ class QuestionRepository:
         db.refresh(question)
         return question
     
+    @staticmethod
+    def bulk_create(db: Session, exam_ids: List[int], questions: list) -> None:
+        """Insert the same generated questions into each exam in one statement.
+        
+        ``questions`` are generated question objects with question_number,
+        question_text, context and rubric. The caller commits.
+        """
+        rows = [
+            {
+                "exam_id": exam_id,
+                "question_number": q.question_number,
+                "question_text": q.question_text,
+                "context": q.context,
+                "rubric": q.rubric,
+                "is_followup": False
+            }
+            for exam_id in exam_ids
+            for q in questions
+        ]
+        if rows:
+            db.execute(insert(Question), rows)
+    
+    @staticmethod
+    def delete_by_exams(db: Session, exam_ids: List[int]) -> None:
+        """Delete all questions belonging to the given exams. The caller commits."""
+        db.execute(
+            delete(Question).where(Question.exam_id.in_(exam_ids)).execution_options(synchronize_session=False)
+        )
+    
     @staticmethod
     def get(db: Session, question_id: int) -> Optional[Question]:
         """Get question by ID."""
-        return db.query(Question).filter(Question.id == question_id).first()
+        return db.get(Question, question_id)
     
     @staticmethod
     def get_by_exam(db: Session, exam_id: int) -> List[Question]:
         """Get all questions for an exam."""
         return db.query(Question).filter(Question.exam_id == exam_id).order_by(Question.question_number).all()
     
+    @staticmethod
+    def count_answered(db: Session, exam_id: int) -> Tuple[int, int]:
+        """Return (answered, total) question counts for an exam in one query."""
+        answered, total = db.query(
+            func.count(Question.id).filter(Question.student_answer.isnot(None)),
+            func.count(Question.id)
+        ).filter(Question.exam_id == exam_id).one()
+        return answered, total
+    
     @staticmethod
     def update_answer(db: Session, question_id: int, answer: str):
         """Update student answer for a question."""
-        question = db.query(Question).filter(Question.id == question_id).first()
+        question = db.get(Question, question_id)
         if question:
             question.student_answer = answer
             db.commit()
@@ -94,11 +138,33 @@ class QuestionRepository:
     @staticmethod
     def update_grade(db: Session, question_id: int, grade: float, feedback: str):
         """Update grade and feedback for a question."""
-        question = db.query(Question).filter(Question.id == question_id).first()
+        question = db.get(Question, question_id)
         if question:
             question.grade = grade
             question.feedback = feedback
             db.commit()
-            db.refresh(question)
         return question
 
+
+class EnrollmentRepository:
+    """Repository for course enrollment operations."""
+    
+    @staticmethod
+    def enroll(db: Session, student_id: int, course_id: int) -> Optional[int]:
+        """Enroll a student in a course.
+        
+        Uses INSERT ... ON CONFLICT DO NOTHING on the (student_id, course_id)
+        unique constraint, so the duplicate check and the insert are a single
+        atomic statement. Returns the new enrollment id, or None if the
+        student was already enrolled.
+        """
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(Enrollment).values(
+            student_id=student_id,
+            course_id=course_id
+        ).on_conflict_do_nothing(
+            index_elements=["student_id", "course_id"]
+        ).returning(Enrollment.id)
+        enrollment_id = db.execute(stmt).scalar_one_or_none()
+        db.commit()
+        return enrollment_id
@@ -0,0 +1,18 @@
+"""Record of which standalone migration scripts have already run."""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def is_applied(db: Session, name: str) -> bool:
+    """Return True if the named migration has already completed on this database."""
+    db.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "name VARCHAR(100) PRIMARY KEY, applied_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    result = db.execute(text("SELECT 1 FROM schema_migrations WHERE name = :name"), {"name": name})
+    return result.first() is not None
+
+
+def mark_applied(db: Session, name: str) -> None:
+    """Record the named migration as applied; commits with the caller's transaction."""
+    db.execute(text("INSERT OR IGNORE INTO schema_migrations (name) VALUES (:name)"), {"name": name})
@@ -1,21 +1,25 @@
-from app.db.session import SessionLocal
+from sqlalchemy.dialects.sqlite import insert
+from app.db.session import SessionManager
 from app.db.models import User
+from app.services.auth_service import hash_password
 
 def seed_users():
-    db = SessionLocal()
+    # Both test users share a password, so it is hashed once for the batch
+    password_hash = hash_password("password123")
     
     # List of test users
     test_users = [
-        {"email": "student@test.com", "password_hash": "password123", "role": "student"},
-        {"email": "teacher@test.com", "password_hash": "password123", "role": "teacher"},
+        {"email": "student@test.com", "password_hash": password_hash, "role": "student", "first_name": "Test", "last_name": "Student"},
+        {"email": "teacher@test.com", "password_hash": password_hash, "role": "teacher", "first_name": "Test", "last_name": "Teacher"},
     ]
-    
-    for u in test_users:
-        exists = db.query(User).filter(User.email == u["email"]).first()
-        if not exists:
-            user = User(**u)
-            db.add(user)
-    
-    db.commit()
-    db.close()
-    print("Seeded test users successfully (or they already exist).")
\ No newline at end of file
+
+    # One INSERT for all users; ones whose email is already taken are skipped
+    stmt = insert(User).values(test_users).on_conflict_do_nothing(index_elements=["email"])
+    with SessionManager() as db:
+        db.execute(stmt)
+        db.commit()
+    print("Seeded test users successfully (or they already exist).")
+
+
+if __name__ == "__main__":
+    seed_users()
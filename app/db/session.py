@@ -2,11 +2,30 @@
 from app.db.base import SessionLocal
 
 
+class SessionManager:
+    """Context manager that owns a database session for one unit of work.
+
+    The session is rolled back if the block raises and is always closed on
+    exit, so its connection goes back to the pool deterministically.
+    """
+
+    def __init__(self):
+        self.db = None
+
+    def __enter__(self):
+        self.db = SessionLocal()
+        return self.db
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is not None:
+                self.db.rollback()
+        finally:
+            self.db.close()
+        return False
+
+
 def get_db():
     """Dependency for getting database session."""
-    db = SessionLocal()
-    try:
+    with SessionManager() as db:
         yield db
-    finally:
-        db.close()
-
@@ -1,164 +1,158 @@
 """Main FastAPI application."""
 import logging
+import os
+import traceback
+from contextlib import asynccontextmanager
+import anyio.to_thread
+import uvicorn
 from fastapi import FastAPI, Request, Depends, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
-from jinja2 import Environment, FileSystemLoader
-from sqlalchemy.orm import Session, joinedload
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.datastructures import FormData
+from sqlalchemy.orm import Session, joinedload, contains_eager
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import or_, and_
-from sqlalchemy.orm import joinedload
+from sqlalchemy import or_, and_, insert
 from datetime import datetime, timezone, timedelta
+from typing import List, Optional
 from app.api.router import api_router
-from app.db.base import Base, engine
+from app.db.base import optimize_database
+from app.db.init_db import init_db
 from app.db.session import get_db
+from app.api.deps import current_student, current_teacher, owned_exam, request_form
+from app.api.responses import (
+    EXAM_NOT_FOUND_REDIRECT, LOGIN_PAGE_REDIRECT, LOGIN_REQUIRED_REDIRECT, STUDENT_EXAM_NOT_FOUND_REDIRECT
+)
+from app.services.auth_service import SessionUser, get_user_by_email_cached
 from app.db.models import User, Course, Exam, Student, Enrollment, Question, Notification
-from app.db.repo import QuestionRepository, StudentRepository
+from app.db.repo import QuestionRepository, StudentRepository, EnrollmentRepository
+from app.services.notification_service import notification_service
+from app.services.email_service import get_email_service
+from app.services.exam_service import get_open_exams, invalidate_open_exams
+from app.core.security import check_secret_key
 from app.core.grading.generator import QuestionGenerator
+from app.core.schemas.api_models import OptionalFormFloat
 from app.logging_config import setup_logging
+from app.templating import render_template, stream_template
+from app.static_files import CachedStaticFiles
+from app.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
-# Import seeding function
-from app.db.seed_users import seed_users
-
 # Setup logging
 setup_logging()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
-# Seed users if they don’t already exist
-#seed_users()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Check the session key, create missing tables, size the worker threadpool and refresh query planner statistics before serving requests.
+    
+    On shutdown, close the email service's pooled HTTP connections.
+    """
+    check_secret_key()
+    # Done here rather than at import so tools that only import the app (and
+    # the --reload supervisor) don't probe the schema.
+    if get_settings().init_db_on_startup:
+        init_db()
+    # Sync handlers and password hashing run in this pool; anyio's default of
+    # 40 threads is easily exhausted by concurrent logins.
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = get_settings().threadpool_size or max(64, 4 * (os.cpu_count() or 1))
+    optimize_database()
+    yield
+    get_email_service().close()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="BlueVox",
     description="AI-powered oral exam grading system",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Include API routes
 app.include_router(api_router, prefix="/api")
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Compress HTML pages and stylesheets; small redirects and JSON go as is
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Mount static files, cached by browsers except while developing
+app.mount("/static", CachedStaticFiles(
+    directory="app/static",
+    max_age=0 if get_settings().environment == "development" else get_settings().static_max_age
+), name="static")
 
-# Templates
-env = Environment(loader=FileSystemLoader("app/templates"))
 
+_MIN_DATETIME = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _sortable_datetime(dt):
+    """Normalize a possibly naive or missing datetime to an aware UTC value for sorting."""
+    if dt is None:
+        return _MIN_DATETIME
+    if dt.tzinfo is None:
+        # Naive datetime, assume UTC
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
 
-def render_template(template_name: str, context: dict) -> HTMLResponse:
-    """Render a Jinja2 template."""
-    template = env.get_template(template_name)
-    html_content = template.render(**context)
-    return HTMLResponse(content=html_content)
 
 @app.get("/student/dashboard", response_class=HTMLResponse)
-async def student_dashboard(request: Request, db: Session = Depends(get_db)):
+def student_dashboard(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_student)
+):
     """Student dashboard page with personalized welcome, courses, and exams."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    # Get the user's Student record (if any)
+    student_record = db.query(Student).filter(Student.username == user.email).first()
     
     # Use first_name if available, otherwise fallback to "Student"
     first_name = user.first_name if user.first_name else "Student"
     
-    # Get or create Student record
-    student_record = db.query(Student).filter(Student.username == user.email).first()
-    
     # Get student's enrolled courses
     student_courses = []
     if student_record:
-        # Get enrollments for this student
-        enrollments = db.query(Enrollment).filter(
+        # Join enrollments to their courses; the inner join skips deleted courses
+        courses = db.query(Course.course_number, Course.section, Course.quarter_year).join(
+            Enrollment, Enrollment.course_id == Course.id
+        ).filter(
             Enrollment.student_id == student_record.id
-        ).all()
+        ).order_by(Enrollment.id).all()
         
-        for enrollment in enrollments:
-            course = enrollment.course
-            if course:  # Course might be deleted
-                student_courses.append({
-                    "course_number": course.course_number,
-                    "section": course.section,
-                    "quarter_year": course.quarter_year,
-                    "course": course
-                })
+        student_courses = [dict(course._mapping) for course in courses]
+    
+    # Get all of the student's own exams once; both exam lists below are
+    # matched against them by offering instead of querying per exam
+    student_exams_all = []
+    if student_record:
+        student_exams_all = db.query(Exam).filter(
+            Exam.student_id == student_record.id
+        ).order_by(Exam.completed_at.desc().nulls_last()).all()
+    
+    attempts_by_offering = {}
+    completed_offerings = set()
+    for student_exam in student_exams_all:
+        offering = (student_exam.course_number, student_exam.section, student_exam.exam_name, student_exam.quarter_year)
+        attempts_by_offering.setdefault(offering, student_exam)
+        if student_exam.status == "completed":
+            completed_offerings.add(offering)
     
     # Get open exams available to the student (published, not terminated, template exams)
     now = datetime.now(timezone.utc)
-    open_exams_query = db.query(Exam).filter(
-        Exam.date_published.isnot(None),  # Must be published
-        Exam.status != "terminated",  # Not terminated
-        Exam.student_id.is_(None)  # Only template exams (instructor-created)
-    ).order_by(Exam.date_published.desc())
-    
-    open_exams = open_exams_query.all()
+    open_exams = get_open_exams(db)
     
     # Filter out exams student has already completed
-    available_open_exams = []
-    if student_record:
-        for exam in open_exams:
-            # Check if student has completed this exam
-            completed = db.query(Exam).filter(
-                Exam.course_number == exam.course_number,
-                Exam.section == exam.section,
-                Exam.exam_name == exam.exam_name,
-                Exam.quarter_year == exam.quarter_year,
-                Exam.student_id == student_record.id,
-                Exam.status == "completed"
-            ).first()
-            
-            if not completed:
-                # Get student name from exam if it's a student exam
-                available_open_exams.append({
-                    "exam_id": exam.exam_id,
-                    "course_number": exam.course_number,
-                    "section": exam.section,
-                    "exam_name": exam.exam_name,
-                    "quarter_year": exam.quarter_year,
-                    "instructor_name": exam.instructor_name,
-                    "status": "active" if exam.date_published else "not_started",
-                    "date_published": exam.date_published,
-                    "date_start": exam.date_start,
-                    "date_end": exam.date_end,
-                    "is_timed": exam.is_timed,
-                    "duration_hours": exam.duration_hours,
-                    "duration_minutes": exam.duration_minutes
-                })
-    else:
-        # No student record yet, show all open exams
-        for exam in open_exams:
-            available_open_exams.append({
-                "exam_id": exam.exam_id,
-                "course_number": exam.course_number,
-                "section": exam.section,
-                "exam_name": exam.exam_name,
-                "quarter_year": exam.quarter_year,
-                "instructor_name": exam.instructor_name,
-                "status": "active" if exam.date_published else "not_started",
-                "date_published": exam.date_published,
-                "date_start": exam.date_start,
-                "date_end": exam.date_end,
-                "is_timed": exam.is_timed,
-                "duration_hours": exam.duration_hours,
-                "duration_minutes": exam.duration_minutes
-            })
+    available_open_exams = [
+        exam for exam in open_exams
+        if (exam["course_number"], exam["section"], exam["exam_name"], exam["quarter_year"]) not in completed_offerings
+    ]
     
     # Get previous exams (completed by student or closed/terminated)
     previous_exams = []
     if student_record:
-        # Get all student exams (completed, in_progress on closed exams, etc.)
-        student_exams_all = db.query(Exam).filter(
-            Exam.student_id == student_record.id
-        ).order_by(Exam.completed_at.desc().nulls_last()).all()
-        
         # Track which exams we've already added (by exam_id)
         added_exam_ids = set()
         
@@ -196,13 +190,9 @@ async def student_dashboard(request: Request, db: Session = Depends(get_db)):
             template_exam_id = exam.exam_id
             if template_exam_id not in added_exam_ids:
                 # Check if student attempted but didn't complete it
-                student_attempt = db.query(Exam).filter(
-                    Exam.course_number == exam.course_number,
-                    Exam.section == exam.section,
-                    Exam.exam_name == exam.exam_name,
-                    Exam.quarter_year == exam.quarter_year,
-                    Exam.student_id == student_record.id
-                ).first()
+                student_attempt = attempts_by_offering.get(
+                    (exam.course_number, exam.section, exam.exam_name, exam.quarter_year)
+                )
                 
                 if student_attempt:
                     # Student attempted but didn't complete - add it
@@ -224,23 +214,12 @@ async def student_dashboard(request: Request, db: Session = Depends(get_db)):
                     })
         
         # Sort previous exams by completion date or end availability date
-        # Normalize all datetimes to timezone-aware for comparison
-        def normalize_datetime(dt):
-            if dt is None:
-                return datetime.min.replace(tzinfo=timezone.utc)
-            if dt.tzinfo is None:
-                # Naive datetime, assume UTC
-                return dt.replace(tzinfo=timezone.utc)
-            return dt
-        
         previous_exams.sort(key=lambda x: (
-            normalize_datetime(x["completed_at"]),
-            normalize_datetime(x.get("date_end_availability"))
+            _sortable_datetime(x["completed_at"]),
+            _sortable_datetime(x.get("date_end_availability"))
         ), reverse=True)
     
     # Get notifications for the user
-    from app.services.notification_service import NotificationService
-    notification_service = NotificationService()
     notifications = notification_service.get_user_notifications(db, user.id, unread_only=False, limit=10)
     unread_count = notification_service.get_unread_count(db, user.id)
     
@@ -258,22 +237,16 @@ async def student_dashboard(request: Request, db: Session = Depends(get_db)):
     })
 
 @app.get("/student/search-course", response_class=HTMLResponse)
-async def student_search_course(
+def student_search_course(
     request: Request,
     course_number: str = None,
     section: str = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_student)
 ):
     """Handle course search and redirect to course page."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "student":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
     # Get query parameters
     course_number = request.query_params.get("course_number", "").strip().upper()
@@ -295,22 +268,19 @@ async def student_search_course(
     return RedirectResponse(url=f"/student/course/{course_number}/{section}", status_code=302)
 
 @app.get("/student/course/{course_number}/{section}", response_class=HTMLResponse)
-async def student_course_page(
+def student_course_page(
     request: Request,
     course_number: str,
     section: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_student)
 ):
     """Display course page with registration option or open exams for students."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "student":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    # Get the user's Student record (if any)
+    student_record = db.query(Student).filter(Student.username == user.email).first()
     
     # Get course from database
     course = db.query(Course).filter(
@@ -321,8 +291,7 @@ async def student_course_page(
     if not course:
         return RedirectResponse(url="/student/dashboard?error=course_not_found", status_code=302)
     
-    # Get or create Student record for this user
-    student_record = db.query(Student).filter(Student.username == user.email).first()
+    # Create the Student record on first use
     if not student_record:
         student_record = Student(username=user.email)
         db.add(student_record)
@@ -365,21 +334,18 @@ async def student_course_page(
         Exam.student_id.is_(None)  # Only template exams (not student-specific)
     ).order_by(Exam.date_published.desc()).all()
     
-    # Filter out exams that this student has already completed
-    available_exams = []
-    for exam in open_exams:
-        # Check if this student has already taken this exam
-        existing_student_exam = db.query(Exam).filter(
-            Exam.course_number == exam.course_number,
-            Exam.section == exam.section,
-            Exam.exam_name == exam.exam_name,
-            Exam.quarter_year == exam.quarter_year,
+    # Filter out exams that this student has already completed; only the
+    # names of their completed exams in this course are needed to tell
+    completed_exam_names = {
+        exam_name for (exam_name,) in db.query(Exam.exam_name).filter(
+            Exam.course_number == course_number.upper(),
+            Exam.section == section,
+            Exam.quarter_year == course.quarter_year,
             Exam.student_id == student_record.id,
             Exam.status == "completed"
-        ).first()
-        
-        if not existing_student_exam:
-            available_exams.append(exam)
+        )
+    }
+    available_exams = [exam for exam in open_exams if exam.exam_name not in completed_exam_names]
     
     error = request.query_params.get("error", "")
     
@@ -395,22 +361,19 @@ async def student_course_page(
     })
 
 @app.post("/student/course/{course_number}/{section}/register")
-async def student_register_course(
+def student_register_course(
     request: Request,
     course_number: str,
     section: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_student)
 ):
     """Register student for a course."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "student":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    # Get the user's Student record (if any)
+    student_record = db.query(Student).filter(Student.username == user.email).first()
     
     # Get course from database
     course = db.query(Course).filter(
@@ -421,52 +384,36 @@ async def student_register_course(
     if not course:
         return RedirectResponse(url=f"/student/course/{course_number}/{section}?error=course_not_found", status_code=302)
     
-    # Get or create Student record for this user
-    student_record = db.query(Student).filter(Student.username == user.email).first()
+    # Create the Student record on first use
     if not student_record:
         student_record = Student(username=user.email)
         db.add(student_record)
         db.commit()
         db.refresh(student_record)
     
-    # Check if already enrolled
-    existing_enrollment = db.query(Enrollment).filter(
-        Enrollment.student_id == student_record.id,
-        Enrollment.course_id == course.id
-    ).first()
-    
-    if existing_enrollment:
-        return RedirectResponse(url=f"/student/course/{course_number}/{section}?error=already_enrolled", status_code=302)
-    
-    # Create enrollment
+    # Enroll unless already enrolled (single atomic insert)
     try:
-        enrollment = Enrollment(
-            student_id=student_record.id,
-            course_id=course.id
-        )
-        db.add(enrollment)
-        db.commit()
+        enrollment_id = EnrollmentRepository.enroll(db, student_record.id, course.id)
+        if enrollment_id is None:
+            return RedirectResponse(url=f"/student/course/{course_number}/{section}?error=already_enrolled", status_code=302)
         return RedirectResponse(url=f"/student/course/{course_number}/{section}?success=enrolled", status_code=302)
     except IntegrityError:
         db.rollback()
         return RedirectResponse(url=f"/student/course/{course_number}/{section}?error=enrollment_failed", status_code=302)
 
 @app.get("/student/exam/{exam_id}", response_class=HTMLResponse)
-async def student_exam_details_page(
+def student_exam_details_page(
     request: Request,
     exam_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_student)
 ):
     """Display exam details page for students with option to start exam."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "student":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    # Get the user's Student record (if any)
+    student_record = db.query(Student).filter(Student.username == user.email).first()
     
     # Get exam from database (using exam_id string, not id integer)
     # This gets the template exam (instructor-created exam with no student)
@@ -476,14 +423,12 @@ async def student_exam_details_page(
     ).first()
     
     if not exam:
-        return RedirectResponse(url="/student/dashboard?error=exam_not_found", status_code=302)
+        return STUDENT_EXAM_NOT_FOUND_REDIRECT
     
     # Verify exam is available (published and not terminated)
     if not exam.date_published or exam.status == "terminated":
         return RedirectResponse(url="/student/dashboard?error=This exam is not available", status_code=302)
     
-    # Get or create Student record for this user
-    student_record = db.query(Student).filter(Student.username == user.email).first()
     
     # Check if student has already started this exam
     # Look for exam with same course, section, exam_name, quarter, and student
@@ -516,18 +461,15 @@ async def student_exam_details_page(
 async def student_start_exam(
     request: Request,
     exam_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_student)
 ):
     """Start an exam for a student."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "student":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    # Get the user's Student record (if any)
+    student_record = db.query(Student).filter(Student.username == user.email).first()
     
     # Get exam from database (template exam - instructor-created with no student)
     exam = db.query(Exam).filter(
@@ -536,14 +478,13 @@ async def student_start_exam(
     ).first()
     
     if not exam:
-        return RedirectResponse(url="/student/dashboard?error=exam_not_found", status_code=302)
+        return STUDENT_EXAM_NOT_FOUND_REDIRECT
     
     # Verify exam is available (published and not terminated)
     if not exam.date_published or exam.status == "terminated":
         return RedirectResponse(url=f"/student/exam/{exam_id}?error=This exam is not available", status_code=302)
     
-    # Get or create Student record for this user
-    student_record = db.query(Student).filter(Student.username == user.email).first()
+    # Create the Student record on first use
     if not student_record:
         student_record = Student(username=user.email)
         db.add(student_record)
@@ -605,16 +546,7 @@ async def student_start_exam(
                     additional_details=additional_details if additional_details else ""
                 )
                 
-                for gen_question in generated_exam.questions:
-                    QuestionRepository.create(
-                        db=db,
-                        exam_id=student_exam.id,
-                        question_number=gen_question.question_number,
-                        question_text=gen_question.question_text,
-                        context=gen_question.context,
-                        rubric=gen_question.rubric,
-                        is_followup=False
-                    )
+                QuestionRepository.bulk_create(db, [student_exam.id], generated_exam.questions)
                 db.commit()
             except Exception as e:
                 logger.error(f"Error generating questions for existing student exam: {e}")
@@ -692,20 +624,10 @@ async def student_start_exam(
                 logger.info(f"Successfully generated {len(generated_exam.questions)} questions for student exam {new_student_exam.id}")
                 
                 # Create questions for student's exam
-                for gen_question in generated_exam.questions:
-                    QuestionRepository.create(
-                        db=db,
-                        exam_id=new_student_exam.id,
-                        question_number=gen_question.question_number,
-                        question_text=gen_question.question_text,
-                        context=gen_question.context,
-                        rubric=gen_question.rubric,
-                        is_followup=False
-                    )
+                QuestionRepository.bulk_create(db, [new_student_exam.id], generated_exam.questions)
                 db.commit()
                 logger.info(f"Successfully saved {len(generated_exam.questions)} questions to database for student exam {new_student_exam.id}")
             except Exception as e:
-                import traceback
                 error_trace = traceback.format_exc()
                 logger.error(f"Error generating questions for student exam {new_student_exam.id}: {e}\n{error_trace}")
                 db.rollback()
@@ -729,214 +651,67 @@ async def student_start_exam(
             return RedirectResponse(url=f"/student/exam/{exam_id}?error=Error starting exam: {str(e)}", status_code=302)
 
 @app.get("/teacher/dashboard", response_class=HTMLResponse)
-async def teacher_dashboard(request: Request, db: Session = Depends(get_db)):
+def teacher_dashboard(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher)
+):
     """Teacher dashboard page with personalized welcome."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
     # Use first_name if available, otherwise fallback to "Teacher"
     first_name = user.first_name if user.first_name else "Teacher"
     
-    # Query courses for this instructor from database
-    courses = db.query(Course).filter(Course.instructor_id == user.id).all()
-    
-    # Query open exams for this instructor (only published exams that students can take, not terminated)
-    # Join with Student to get student info, then try to match with User
-    open_exams_query = db.query(Exam).outerjoin(
-        Student, Exam.student_id == Student.id
-    ).filter(
-        Exam.instructor_id == user.id,
-        Exam.date_published.isnot(None),  # Only published exams
-        Exam.status != "terminated"  # Not terminated
-    ).order_by(Exam.date_published.desc())  # Show most recent first
-    
-    # Build exam data with student info
-    open_exams = []
-    for exam in open_exams_query.all():
-        student = None
-        user_obj = None
-        
-        if exam.student_id:
-            student = db.query(Student).filter(Student.id == exam.student_id).first()
-            if student:
-                # Try to find User by email (assuming username might be email)
-                user_obj = db.query(User).filter(User.email == student.username).first()
-        
-        # Calculate percent if final_grade exists
-        percent = exam.final_grade * 100 if exam.final_grade else None
-        
-        # Calculate letter grade
-        grade = None
-        if percent is not None:
-            if percent >= 90:
-                grade = "A"
-            elif percent >= 80:
-                grade = "B"
-            elif percent >= 70:
-                grade = "C"
-            elif percent >= 60:
-                grade = "D"
-            else:
-                grade = "F"
-        
-        open_exams.append({
-            "exam_id": exam.exam_id,
-            "exam_name": exam.exam_name,
-            "course_number": exam.course_number,
-            "section": exam.section,
-            "quarter_year": exam.quarter_year,
-            "student_id": user_obj.student_id if user_obj else (student.username if student else None),
-            "first_name": user_obj.first_name if user_obj else None,
-            "last_name": user_obj.last_name if user_obj else None,
-            "status": exam.status,
-            "percent": percent,
-            "grade": grade,
-            "final_grade": exam.final_grade,
-            "date_started": exam.created_at if exam.student_id else None,
-            "date_completed": exam.completed_at,
-            "date_published": exam.date_published,
-            "student": student.username if student else None
-        })
-    
-    # Query closed exams for this instructor (terminated or completed)
-    now = datetime.now(timezone.utc)
-    closed_exams_query = db.query(Exam).outerjoin(
-        Student, Exam.student_id == Student.id
-    ).filter(
-        Exam.instructor_id == user.id,
-        Exam.date_published.isnot(None),  # Must have been published
-        or_(
-            Exam.status == "terminated",
-            Exam.status == "completed",
-            and_(Exam.date_end_availability.isnot(None), Exam.date_end_availability < now)
-        )
-    ).order_by(Exam.date_end_availability.desc(), Exam.completed_at.desc(), Exam.date_published.desc()).all()  # Show most recently closed first
-    
-    # Build closed exam data with student info
-    closed_exams = []
-    for exam in closed_exams_query:
-        student = None
-        user_obj = None
-        
-        if exam.student_id:
-            student = db.query(Student).filter(Student.id == exam.student_id).first()
-            if student:
-                # Try to find User by email (assuming username might be email)
-                user_obj = db.query(User).filter(User.email == student.username).first()
-        
-        # Calculate percent if final_grade exists
-        percent = exam.final_grade * 100 if exam.final_grade else None
-        
-        # Calculate letter grade
-        grade = None
-        if percent is not None:
-            if percent >= 90:
-                grade = "A"
-            elif percent >= 80:
-                grade = "B"
-            elif percent >= 70:
-                grade = "C"
-            elif percent >= 60:
-                grade = "D"
-            else:
-                grade = "F"
-        
-        closed_exams.append({
-            "exam_id": exam.exam_id,
-            "exam_name": exam.exam_name,
-            "course_number": exam.course_number,
-            "section": exam.section,
-            "quarter_year": exam.quarter_year,
-            "student_id": user_obj.student_id if user_obj else (student.username if student else None),
-            "first_name": user_obj.first_name if user_obj else None,
-            "last_name": user_obj.last_name if user_obj else None,
-            "status": exam.status,
-            "percent": percent,
-            "grade": grade,
-            "final_grade": exam.final_grade,
-            "date_started": exam.created_at if exam.student_id else None,
-            "date_completed": exam.completed_at,
-            "date_published": exam.date_published,
-            "date_end_availability": exam.date_end_availability,
-            "student": student.username if student else None
-        })
+    # Query courses for this instructor; the dashboard only shows number and section
+    courses = db.query(Course.course_number, Course.section).filter(Course.instructor_id == user.id).all()
     
     # Get notifications for the user
-    from app.services.notification_service import NotificationService
-    notification_service = NotificationService()
     notifications = notification_service.get_user_notifications(db, user.id, unread_only=False, limit=10)
     unread_count = notification_service.get_unread_count(db, user.id)
     
-    return render_template("teacher_dashboard.html", {
+    return stream_template("teacher_dashboard.html", {
         "request": request,
         "first_name": first_name,
         "courses": courses,
-        "open_exams": open_exams,
-        "closed_exams": closed_exams,
         "notifications": notifications,
         "unread_count": unread_count
     })
 
+# Year options for the course form (20-35 for years 2020-2035 in short format)
+_YEAR_OPTIONS = tuple(str(year) for year in range(20, 36))
+
+
 @app.get("/teacher/register-course", response_class=HTMLResponse)
-async def register_course_page(request: Request, db: Session = Depends(get_db)):
+def register_course_page(
+    request: Request,
+    user: Optional[SessionUser] = Depends(current_teacher)
+):
     """Display the register new course form."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Generate year options (20-35 for years 2020-2035 in short format)
-    year_options = [str(year) for year in range(20, 36)]
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
     error = request.query_params.get("error", "")
     
     return render_template("register_course.html", {
         "request": request,
-        "year_options": year_options,
+        "year_options": _YEAR_OPTIONS,
         "error": error
     })
 
 @app.post("/teacher/register-course")
-async def register_course(
+def register_course(
     request: Request,
     course_number: str = Form(...),
     quarter: str = Form(...),
     year: str = Form(...),
-    db: Session = Depends(get_db)
+    sections: List[str] = Form([], alias="sections[]"),
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher)
 ):
     """Handle course registration form submission."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get sections from form (as list) - FastAPI form data
-    form_data = await request.form()
-    sections_raw = form_data.getlist("sections[]")
-    # If getlist doesn't work, try getting as single value first
-    if not sections_raw:
-        # Fallback: check if it's a single value
-        single_section = form_data.get("sections[]")
-        sections = [single_section] if single_section else []
-    else:
-        sections = sections_raw
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
     # Validate input
     if not sections or len(sections) == 0:
@@ -948,45 +723,36 @@ async def register_course(
     # Build quarter_year string (e.g., "Spring26")
     quarter_year = f"{quarter}{year}"
     
-    # Create a course record for each section
-    created_courses = []
-    errors = []
+    # Unique, non-empty sections in the order submitted
+    section_list = list(dict.fromkeys(section.strip() for section in sections if section.strip()))
     
-    for section in sections:
-        section = section.strip()
-        if not section:
-            continue
-            
-        try:
-            # Check if course already exists
-            existing = db.query(Course).filter(
-                Course.course_number == course_number,
-                Course.section == section,
-                Course.quarter_year == quarter_year,
-                Course.instructor_id == user.id
-            ).first()
-            
-            if existing:
-                errors.append(f"Course {course_number} Section {section} for {quarter_year} already exists")
-                continue
-            
-            # Create new course
-            course = Course(
-                course_number=course_number,
-                section=section,
-                quarter_year=quarter_year,
-                instructor_id=user.id
-            )
-            db.add(course)
-            created_courses.append(course)
-            
-        except IntegrityError as e:
-            db.rollback()
-            errors.append(f"Error creating {course_number} Section {section}: {str(e)}")
-    
-    # Commit all courses
+    # Find the sections this instructor already registered in one query
+    existing_sections = {
+        section for (section,) in db.query(Course.section).filter(
+            Course.course_number == course_number,
+            Course.section.in_(section_list),
+            Course.quarter_year == quarter_year,
+            Course.instructor_id == user.id
+        )
+    }
+    errors = [
+        f"Course {course_number} Section {section} for {quarter_year} already exists"
+        for section in section_list if section in existing_sections
+    ]
+    
+    # Create a course record for each new section in one statement
+    created_courses = [
+        {
+            "course_number": course_number,
+            "section": section,
+            "quarter_year": quarter_year,
+            "instructor_id": user.id
+        }
+        for section in section_list if section not in existing_sections
+    ]
     if created_courses:
         try:
+            db.execute(insert(Course), created_courses)
             db.commit()
         except Exception as e:
             db.rollback()
@@ -1005,20 +771,20 @@ async def register_course(
     return RedirectResponse(url="/teacher/dashboard?success=course_registered", status_code=302)
 
 @app.get("/teacher/create-exam", response_class=HTMLResponse)
-async def create_exam_page(request: Request, db: Session = Depends(get_db)):
+def create_exam_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher)
+):
     """Display the create new exam form."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get courses for this instructor and group by course_number
-    all_courses = db.query(Course).filter(Course.instructor_id == user.id).all()
+    # Get courses for this instructor and group by course_number; the form
+    # only needs each course's number, section and quarter
+    all_courses = db.query(Course.course_number, Course.section, Course.quarter_year).filter(
+        Course.instructor_id == user.id
+    ).all()
     
     # Get unique course numbers (to avoid duplicates in dropdown)
     unique_course_numbers = sorted(set(course.course_number for course in all_courses))
@@ -1043,23 +809,17 @@ async def create_exam_page(request: Request, db: Session = Depends(get_db)):
 @app.post("/teacher/create-exam")
 async def create_exam(
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher)
 ):
     """Handle exam creation form submission."""
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
+    
     try:
         # Get form data manually to handle missing fields gracefully
         form_data = await request.form()
         
-        # Get email from cookie
-        email = request.cookies.get("username")
-        if not email:
-            return RedirectResponse(url="/?error=login_required", status_code=302)
-        
-        # Get user from database
-        user = db.query(User).filter(User.email == email).first()
-        if not user or user.role != "teacher":
-            return RedirectResponse(url="/?error=login_required", status_code=302)
-        
         # Extract form fields with error handling
         course_number = form_data.get("course_number", "").strip()
         quarter_year = form_data.get("quarter_year", "").strip()
@@ -1103,20 +863,9 @@ async def create_exam(
         except (ValueError, TypeError):
             return RedirectResponse(url="/teacher/create-exam?error=Invalid number of questions", status_code=302)
         
-        # Get sections from form (as list from checkboxes)
-        sections_raw = form_data.getlist("sections[]")
-        if not sections_raw:
-            single_section = form_data.get("sections[]")
-            sections = [single_section] if single_section else []
-        else:
-            sections = sections_raw
-        
-        # Validate input
-        if not sections or len(sections) == 0:
-            return RedirectResponse(url="/teacher/create-exam?error=At least one section must be selected", status_code=302)
-        
-        # Remove duplicates and empty strings
-        sections = list(set([s.strip() for s in sections if s and s.strip()]))
+        # Get sections from form (as list from checkboxes), without duplicates
+        # or empty strings
+        sections = list(dict.fromkeys(s.strip() for s in form_data.getlist("sections[]") if s.strip()))
         if not sections:
             return RedirectResponse(url="/teacher/create-exam?error=At least one section must be selected", status_code=302)
         
@@ -1159,7 +908,6 @@ async def create_exam(
                 additional_details=llm_prompt if llm_prompt else ""
             )
         except Exception as e:
-            import traceback
             error_details = str(e)
             error_trace = traceback.format_exc()
             logger.error(f"Error generating exam questions: {error_details}")
@@ -1247,24 +995,10 @@ async def create_exam(
         # Commit all exams at once
         if created_exams:
             try:
-                db.commit()
-                # Refresh all created exams
-                for exam in created_exams:
-                    db.refresh(exam)
-                
-                # Create questions for all exams (they all share the same questions)
-                for exam in created_exams:
-                    for gen_question in generated_exam.questions:
-                        QuestionRepository.create(
-                            db=db,
-                            exam_id=exam.id,
-                            question_number=gen_question.question_number,
-                            question_text=gen_question.question_text,
-                            context=gen_question.context,
-                            rubric=gen_question.rubric,
-                            is_followup=False
-                        )
-                
+                # Flush to assign primary keys, then insert every exam's questions
+                # (they all share the same questions) in one statement
+                db.flush()
+                QuestionRepository.bulk_create(db, [exam.id for exam in created_exams], generated_exam.questions)
                 db.commit()
             except Exception as e:
                 db.rollback()
@@ -1291,29 +1025,22 @@ async def create_exam(
             
     except Exception as e:
         # Catch any unexpected errors
-        import traceback
         error_details = str(e)
         print(f"Error in create_exam: {error_details}")
         print(traceback.format_exc())
         return RedirectResponse(url=f"/teacher/create-exam?error=Unexpected error: {error_details}", status_code=302)
 
 @app.get("/teacher/course/{course_number}/{section}", response_class=HTMLResponse)
-async def course_page(
+def course_page(
     request: Request,
     course_number: str,
     section: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher)
 ):
     """Display course page with exams."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
     # Get course from database (verify it belongs to this instructor)
     course = db.query(Course).filter(
@@ -1325,8 +1052,11 @@ async def course_page(
     if not course:
         return RedirectResponse(url="/teacher/dashboard?error=course_not_found", status_code=302)
     
+    # Only the fields the course page lists are selected for each exam
+    exam_columns = (Exam.exam_id, Exam.exam_name, Exam.date_start, Exam.date_end)
+    
     # Query open exams for this course/section (published, not completed, not terminated)
-    open_exams = db.query(Exam).filter(
+    open_exams = db.query(*exam_columns).filter(
         Exam.course_number == course_number.upper(),
         Exam.section == section,
         Exam.quarter_year == course.quarter_year,
@@ -1337,7 +1067,7 @@ async def course_page(
     
     # Query closed exams for this course/section (completed, terminated, or past end date)
     now = datetime.now(timezone.utc)
-    closed_exams = db.query(Exam).filter(
+    closed_exams = db.query(*exam_columns).filter(
         Exam.course_number == course_number.upper(),
         Exam.section == section,
         Exam.quarter_year == course.quarter_year,
@@ -1348,7 +1078,7 @@ async def course_page(
         )
     ).order_by(Exam.date_end_availability.desc()).all()
     
-    return render_template("course_page.html", {
+    return stream_template("course_page.html", {
         "request": request,
         "course_number": course_number.upper(),
         "section": section,
@@ -1358,31 +1088,19 @@ async def course_page(
     })
 
 @app.get("/teacher/exam/{exam_id}/review", response_class=HTMLResponse)
-async def exam_review_page(
+def exam_review_page(
     request: Request,
     exam_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher),
+    exam: Optional[Exam] = Depends(owned_exam)
 ):
     """Display exam review page where instructor can edit and publish."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get exam from database (using exam_id string, not id integer)
-    exam = db.query(Exam).filter(Exam.exam_id == exam_id).first()
-    
-    if not exam:
-        return RedirectResponse(url="/teacher/dashboard?error=exam_not_found", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Verify exam belongs to this instructor
-    if exam.instructor_id != user.id:
-        return RedirectResponse(url="/teacher/dashboard?error=access_denied", status_code=302)
+    if exam is None:
+        return EXAM_NOT_FOUND_REDIRECT
     
     # Get all exams with the same course_number, exam_name, and quarter_year (in case multiple sections)
     related_exams = db.query(Exam).filter(
@@ -1400,7 +1118,6 @@ async def exam_review_page(
     
     # Get questions for this exam
     questions = QuestionRepository.get_by_exam(db, exam.id)
-    questions = sorted(questions, key=lambda q: q.question_number)
     
     # Extract topic and additional details from final_explanation
     # Format: "Topic: <topic>\n\nAdditional Details: <details>" or just topic
@@ -1420,7 +1137,7 @@ async def exam_review_page(
     error = request.query_params.get("error", "")
     success = request.query_params.get("success", "")
     
-    return render_template("exam_review.html", {
+    return stream_template("exam_review.html", {
         "request": request,
         "exam": exam,
         "related_exams": related_exams,
@@ -1434,30 +1151,22 @@ async def exam_review_page(
     })
 
 @app.post("/teacher/exam/{exam_id}/update")
-async def update_exam(
+def update_exam(
     request: Request,
     exam_id: str,
-    db: Session = Depends(get_db)
+    llm_prompt: str = Form(""),
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher),
+    exam: Optional[Exam] = Depends(owned_exam)
 ):
     """Update exam LLM prompt/criteria."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get exam from database
-    exam = db.query(Exam).filter(Exam.exam_id == exam_id).first()
-    if not exam or exam.instructor_id != user.id:
-        return RedirectResponse(url="/teacher/dashboard?error=exam_not_found", status_code=302)
+    if exam is None:
+        return EXAM_NOT_FOUND_REDIRECT
     
-    # Get form data
-    form_data = await request.form()
-    llm_prompt = form_data.get("llm_prompt", "").strip()
+    llm_prompt = llm_prompt.strip()
     
     if not llm_prompt:
         return RedirectResponse(url=f"/teacher/exam/{exam_id}/review?error=LLM prompt cannot be empty", status_code=302)
@@ -1485,23 +1194,16 @@ async def update_exam(
 async def regenerate_exam_questions(
     request: Request,
     exam_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher),
+    exam: Optional[Exam] = Depends(owned_exam)
 ):
     """Regenerate exam questions using AI."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get exam from database
-    exam = db.query(Exam).filter(Exam.exam_id == exam_id).first()
-    if not exam or exam.instructor_id != user.id:
-        return RedirectResponse(url="/teacher/dashboard?error=exam_not_found", status_code=302)
+    if exam is None:
+        return EXAM_NOT_FOUND_REDIRECT
     
     # Don't allow regeneration if exam is published
     if exam.date_published:
@@ -1544,7 +1246,6 @@ async def regenerate_exam_questions(
             additional_details=additional_details if additional_details else ""
         )
     except Exception as e:
-        import traceback
         error_details = str(e)
         print(f"Error regenerating exam questions: {error_details}")
         print(traceback.format_exc())
@@ -1552,23 +1253,9 @@ async def regenerate_exam_questions(
     
     # Delete existing questions and create new ones for all related exams
     try:
-        for related_exam in related_exams:
-            # Delete existing questions
-            existing_questions = QuestionRepository.get_by_exam(db, related_exam.id)
-            for question in existing_questions:
-                db.delete(question)
-            
-            # Create new questions
-            for gen_question in generated_exam.questions:
-                QuestionRepository.create(
-                    db=db,
-                    exam_id=related_exam.id,
-                    question_number=gen_question.question_number,
-                    question_text=gen_question.question_text,
-                    context=gen_question.context,
-                    rubric=gen_question.rubric,
-                    is_followup=False
-                )
+        related_exam_ids = [related_exam.id for related_exam in related_exams]
+        QuestionRepository.delete_by_exams(db, related_exam_ids)
+        QuestionRepository.bulk_create(db, related_exam_ids, generated_exam.questions)
         
         # Update exam metadata
         exam_metadata = f"Topic: {exam_topic}"
@@ -1585,26 +1272,19 @@ async def regenerate_exam_questions(
         return RedirectResponse(url=f"/teacher/exam/{exam_id}/review?error=Error regenerating questions: {str(e)}", status_code=302)
 
 @app.post("/teacher/exam/{exam_id}/publish")
-async def publish_exam(
+def publish_exam(
     request: Request,
     exam_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher),
+    exam: Optional[Exam] = Depends(owned_exam)
 ):
     """Publish exam so it appears in open exams and is available to students."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get exam from database
-    exam = db.query(Exam).filter(Exam.exam_id == exam_id).first()
-    if not exam or exam.instructor_id != user.id:
-        return RedirectResponse(url="/teacher/dashboard?error=exam_not_found", status_code=302)
+    if exam is None:
+        return EXAM_NOT_FOUND_REDIRECT
     
     # Get all related exams (same course, exam name, quarter) that are unpublished
     related_exams = db.query(Exam).filter(
@@ -1623,11 +1303,9 @@ async def publish_exam(
     
     try:
         db.commit()
+        invalidate_open_exams()
         
         # Create notifications for enrolled students
-        from app.services.notification_service import NotificationService
-        notification_service = NotificationService()
-        
         # Find the course for this exam
         course = db.query(Course).filter(
             Course.course_number == exam.course_number,
@@ -1637,21 +1315,22 @@ async def publish_exam(
         ).first()
         
         if course:
-            # Get all enrolled students
-            enrollments = db.query(Enrollment).filter(Enrollment.course_id == course.id).all()
-            for enrollment in enrollments:
-                # Get student's user record
-                student_user = db.query(User).filter(User.email == enrollment.student.username).first()
-                if student_user:
-                    notification_service.create_notification(
-                        db=db,
-                        user_id=student_user.id,
-                        notification_type="exam_available",
-                        title=f"New Exam Available: {exam.exam_name}",
-                        message=f"A new exam '{exam.exam_name}' is now available for {exam.course_number} - Section {exam.section}.",
-                        related_exam_id=exam.id,
-                        related_course_id=course.id
-                    )
+            # Get the user record of every enrolled student in one query
+            student_user_ids = db.query(User.id).join(
+                Student, Student.username == User.email
+            ).join(
+                Enrollment, Enrollment.student_id == Student.id
+            ).filter(Enrollment.course_id == course.id).all()
+            for (student_user_id,) in student_user_ids:
+                notification_service.create_notification(
+                    db=db,
+                    user_id=student_user_id,
+                    notification_type="exam_available",
+                    title=f"New Exam Available: {exam.exam_name}",
+                    message=f"A new exam '{exam.exam_name}' is now available for {exam.course_number} - Section {exam.section}.",
+                    related_exam_id=exam.id,
+                    related_course_id=course.id
+                )
         
         return RedirectResponse(url=f"/teacher/dashboard?success=Exam published successfully", status_code=302)
     except Exception as e:
@@ -1659,31 +1338,19 @@ async def publish_exam(
         return RedirectResponse(url=f"/teacher/exam/{exam_id}/review?error=Error publishing exam: {str(e)}", status_code=302)
 
 @app.get("/teacher/exam/{exam_id}", response_class=HTMLResponse)
-async def exam_details_page(
+def exam_details_page(
     request: Request,
     exam_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher),
+    exam: Optional[Exam] = Depends(owned_exam)
 ):
     """Display exam details page."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get exam from database (using exam_id string, not id integer)
-    exam = db.query(Exam).filter(Exam.exam_id == exam_id).first()
-    
-    if not exam:
-        return RedirectResponse(url="/teacher/dashboard?error=exam_not_found", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Verify exam belongs to this instructor
-    if exam.instructor_id != user.id:
-        return RedirectResponse(url="/teacher/dashboard?error=access_denied", status_code=302)
+    if exam is None:
+        return EXAM_NOT_FOUND_REDIRECT
     
     # Check if this is a student exam (has student_id)
     is_student_exam = exam.student_id is not None
@@ -1693,12 +1360,11 @@ async def exam_details_page(
     if is_student_exam:
         # Get all questions and answers for this student's exam
         questions = QuestionRepository.get_by_exam(db, exam.id)
-        questions = sorted(questions, key=lambda q: q.question_number)
         
         # Get student information
-        student = db.query(Student).filter(Student.id == exam.student_id).first()
+        student = db.get(Student, exam.student_id)
     
-    return render_template("exam_details.html", {
+    return stream_template("exam_details.html", {
         "request": request,
         "exam": exam,
         "is_student_exam": is_student_exam,
@@ -1707,26 +1373,19 @@ async def exam_details_page(
     })
 
 @app.post("/teacher/exam/{exam_id}/terminate")
-async def terminate_exam(
+def terminate_exam(
     request: Request,
     exam_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher),
+    exam: Optional[Exam] = Depends(owned_exam)
 ):
     """Terminate exam so it's no longer available to students."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get exam from database
-    exam = db.query(Exam).filter(Exam.exam_id == exam_id).first()
-    if not exam or exam.instructor_id != user.id:
-        return RedirectResponse(url="/teacher/dashboard?error=exam_not_found", status_code=302)
+    if exam is None:
+        return EXAM_NOT_FOUND_REDIRECT
     
     # Get all related exams (same course, exam name, quarter) that are not terminated
     related_exams = db.query(Exam).filter(
@@ -1745,6 +1404,7 @@ async def terminate_exam(
     
     try:
         db.commit()
+        invalidate_open_exams()
         return RedirectResponse(url=f"/teacher/dashboard?success=Exam terminated successfully", status_code=302)
     except Exception as e:
         db.rollback()
@@ -1753,37 +1413,28 @@ async def terminate_exam(
 
 
 @app.post("/teacher/exam/{exam_id}/alter-grades")
-async def alter_grades(
+def alter_grades(
     request: Request,
     exam_id: str,
-    db: Session = Depends(get_db)
+    final_grade: OptionalFormFloat = Form(None),
+    form_data: FormData = Depends(request_form),
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher),
+    exam: Optional[Exam] = Depends(owned_exam)
 ):
     """Submit grade alterations for disputed exam - shows confirmation page."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get exam from database
-    exam = db.query(Exam).filter(Exam.exam_id == exam_id).first()
-    if not exam or exam.instructor_id != user.id:
-        return RedirectResponse(url="/teacher/dashboard?error=exam_not_found", status_code=302)
+    if exam is None:
+        return EXAM_NOT_FOUND_REDIRECT
     
     # Only allow for disputed or completed exams
     if exam.status not in ["disputed", "completed"]:
         return RedirectResponse(url=f"/teacher/exam/{exam_id}?error=Can only alter grades for disputed or completed exams", status_code=302)
     
-    # Get form data
-    form_data = await request.form()
-    
     # Get all questions for this exam
     questions = QuestionRepository.get_by_exam(db, exam.id)
-    questions = sorted(questions, key=lambda q: q.question_number)
     
     # Store original and new grades for confirmation
     grade_changes = []
@@ -1809,13 +1460,7 @@ async def alter_grades(
                 pass
     
     # Check for final grade change
-    final_grade_str = form_data.get("final_grade", "").strip()
-    new_final_grade = None
-    if final_grade_str:
-        try:
-            new_final_grade = float(final_grade_str)
-        except ValueError:
-            pass
+    new_final_grade = final_grade
     
     # Get grade change reason
     grade_change_reason = form_data.get("grade_change_reason", "").strip()
@@ -1836,34 +1481,26 @@ async def alter_grades(
 
 
 @app.post("/teacher/exam/{exam_id}/confirm-alter")
-async def confirm_alter_grades(
+def confirm_alter_grades(
     request: Request,
     exam_id: str,
-    db: Session = Depends(get_db)
+    final_grade: OptionalFormFloat = Form(None),
+    form_data: FormData = Depends(request_form),
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher),
+    exam: Optional[Exam] = Depends(owned_exam)
 ):
     """Apply confirmed grade alterations."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get exam from database
-    exam = db.query(Exam).filter(Exam.exam_id == exam_id).first()
-    if not exam or exam.instructor_id != user.id:
-        return RedirectResponse(url="/teacher/dashboard?error=exam_not_found", status_code=302)
+    if exam is None:
+        return EXAM_NOT_FOUND_REDIRECT
     
     # Only allow for disputed or completed exams
     if exam.status not in ["disputed", "completed"]:
         return RedirectResponse(url=f"/teacher/exam/{exam_id}?error=Can only alter grades for disputed or completed exams", status_code=302)
     
-    # Get form data
-    form_data = await request.form()
-    
     # Store original final grade for notification
     original_final_grade = exam.final_grade
     
@@ -1884,13 +1521,8 @@ async def confirm_alter_grades(
                 pass
     
     # Update final grade
-    final_grade_str = form_data.get("final_grade", "").strip()
-    if final_grade_str:
-        try:
-            new_final_grade_percent = float(final_grade_str)
-            exam.final_grade = new_final_grade_percent / 100.0  # Convert to 0.0-1.0
-        except ValueError:
-            pass
+    if final_grade is not None:
+        exam.final_grade = final_grade / 100.0  # Convert to 0.0-1.0
     else:
         # Recalculate final grade from question grades
         grades = [q.grade for q in questions if q.grade is not None]
@@ -1910,13 +1542,11 @@ async def confirm_alter_grades(
     
     # Notify student if this is a student exam
     if exam.student_id:
-        student = db.query(Student).filter(Student.id == exam.student_id).first()
+        student = db.get(Student, exam.student_id)
         if student:
             # Find the student's User account
-            student_user = db.query(User).filter(User.email == student.username).first()
+            student_user = get_user_by_email_cached(db, student.username)
             if student_user:
-                from app.services.notification_service import NotificationService
-                notification_service = NotificationService()
                 
                 # Build notification message
                 old_grade_str = f"{original_final_grade * 100:.1f}%" if original_final_grade else "N/A"
@@ -1946,26 +1576,19 @@ async def confirm_alter_grades(
 
 
 @app.post("/teacher/exam/{exam_id}/reopen")
-async def reopen_exam(
+def reopen_exam(
     request: Request,
     exam_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher),
+    exam: Optional[Exam] = Depends(owned_exam)
 ):
     """Reopen a disputed exam for the student to retake."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get exam from database
-    exam = db.query(Exam).filter(Exam.exam_id == exam_id).first()
-    if not exam or exam.instructor_id != user.id:
-        return RedirectResponse(url="/teacher/dashboard?error=exam_not_found", status_code=302)
+    if exam is None:
+        return EXAM_NOT_FOUND_REDIRECT
     
     # Only allow for disputed exams
     if exam.status != "disputed":
@@ -1985,47 +1608,43 @@ async def reopen_exam(
         return RedirectResponse(url=f"/teacher/exam/{exam_id}?error=Failed to reopen exam", status_code=302)
 
 @app.get("/teacher/manage-students", response_class=HTMLResponse)
-async def manage_students_page(request: Request, db: Session = Depends(get_db)):
+def manage_students_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher)
+):
     """Display the manage students page."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
-    # Get all courses for this instructor with enrollments loaded
-    courses = db.query(Course).options(joinedload(Course.enrollments).joinedload(Enrollment.student)).filter(Course.instructor_id == user.id).all()
+    # Get this instructor's courses, their enrollments and each enrolled
+    # student's user account (for display names) in a single query
+    rows = db.query(Course, User).outerjoin(Course.enrollments).outerjoin(Enrollment.student).outerjoin(
+        User, User.email == Student.username
+    ).options(
+        contains_eager(Course.enrollments).contains_eager(Enrollment.student)
+    ).filter(Course.instructor_id == user.id).all()
     
-    # Get all users for name lookup
-    all_users = db.query(User).all()
+    courses = list(dict.fromkeys(course for course, _ in rows))
+    users_by_email = {u.email: u for _, u in rows if u is not None}
     
-    return render_template("manage_students.html", {
+    return stream_template("manage_students.html", {
         "request": request,
         "courses": courses,
-        "all_users": all_users
+        "users_by_email": users_by_email
     })
 
 @app.post("/teacher/manage-students/add-to-course")
-async def add_student_to_course(
+def add_student_to_course(
     request: Request,
     db: Session = Depends(get_db),
     student_email: str = Form(...),
-    course_id: int = Form(...)
+    course_id: int = Form(...),
+    user: Optional[SessionUser] = Depends(current_teacher)
 ):
     """Add a student to a course."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
     # Verify course belongs to instructor
     course = db.query(Course).filter(Course.id == course_id, Course.instructor_id == user.id).first()
@@ -2033,30 +1652,18 @@ async def add_student_to_course(
         return RedirectResponse(url="/teacher/manage-students?error=Course not found or access denied", status_code=302)
     
     # Verify student user exists
-    student_user = db.query(User).filter(User.email == student_email, User.role == "student").first()
-    if not student_user:
+    student_user = get_user_by_email_cached(db, student_email)
+    if not student_user or student_user.role != "student":
         return RedirectResponse(url=f"/teacher/manage-students?error=Student with email {student_email} not found", status_code=302)
     
     # Get or create Student record
     student_record = StudentRepository.get_or_create(db, student_email)
     
-    # Check if enrollment already exists
-    existing_enrollment = db.query(Enrollment).filter(
-        Enrollment.student_id == student_record.id,
-        Enrollment.course_id == course_id
-    ).first()
-    
-    if existing_enrollment:
-        return RedirectResponse(url=f"/teacher/manage-students?error=Student is already enrolled in this course", status_code=302)
-    
-    # Create enrollment
+    # Enroll unless already enrolled (single atomic insert)
     try:
-        enrollment = Enrollment(
-            student_id=student_record.id,
-            course_id=course_id
-        )
-        db.add(enrollment)
-        db.commit()
+        enrollment_id = EnrollmentRepository.enroll(db, student_record.id, course_id)
+        if enrollment_id is None:
+            return RedirectResponse(url=f"/teacher/manage-students?error=Student is already enrolled in this course", status_code=302)
         return RedirectResponse(url=f"/teacher/manage-students?success=Student {student_email} added to {course.course_number} - Section {course.section}", status_code=302)
     except IntegrityError as e:
         db.rollback()
@@ -2064,24 +1671,20 @@ async def add_student_to_course(
         return RedirectResponse(url=f"/teacher/manage-students?error=Failed to add student to course", status_code=302)
 
 @app.post("/teacher/manage-students/remove-from-course")
-async def remove_student_from_course(
+def remove_student_from_course(
     request: Request,
     db: Session = Depends(get_db),
-    enrollment_id: int = Form(...)
+    enrollment_id: int = Form(...),
+    user: Optional[SessionUser] = Depends(current_teacher)
 ):
     """Remove a student from a course."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
     # Get enrollment and verify course belongs to instructor
-    enrollment = db.query(Enrollment).join(Course).filter(
+    enrollment = db.query(Enrollment).join(Course).options(
+        contains_eager(Enrollment.course), joinedload(Enrollment.student)
+    ).filter(
         Enrollment.id == enrollment_id,
         Course.instructor_id == user.id
     ).first()
@@ -2110,7 +1713,7 @@ async def root(request: Request):
 @app.get("/student/login", response_class=RedirectResponse)
 async def student_login_redirect():
     """Redirect to unified login."""
-    return RedirectResponse(url="/", status_code=302)
+    return LOGIN_PAGE_REDIRECT
 
 @app.get("/signup", response_class=HTMLResponse)
 async def signup_page(request: Request):
@@ -2121,21 +1724,18 @@ async def signup_page(request: Request):
 @app.get("/teacher/login", response_class=RedirectResponse)
 async def teacher_login_redirect():
     """Redirect to unified login."""
-    return RedirectResponse(url="/", status_code=302)
+    return LOGIN_PAGE_REDIRECT
 
 
 @app.get("/teacher/exams", response_class=HTMLResponse)
-async def teacher_exams_page(request: Request, db: Session = Depends(get_db)):
+def teacher_exams_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher)
+):
     """Display all exams page."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
     # Get filter parameter
     filter_type = request.query_params.get("filter", "all")
@@ -2154,47 +1754,24 @@ async def teacher_exams_page(request: Request, db: Session = Depends(get_db)):
             or_(Exam.status == "terminated", Exam.status == "completed")
         )
     
-    exams = exams_query.order_by(Exam.created_at.desc()).all()
+    # Load each exam's student in the same query; the template reads the ORM rows directly
+    exams = exams_query.options(joinedload(Exam.student)).order_by(Exam.created_at.desc()).all()
     
-    # Build exam data
-    exam_list = []
-    for exam in exams:
-        student = None
-        if exam.student_id:
-            student = db.query(Student).filter(Student.id == exam.student_id).first()
-        
-        exam_list.append({
-            "exam_id": exam.exam_id,
-            "exam_name": exam.exam_name,
-            "course_number": exam.course_number,
-            "section": exam.section,
-            "quarter_year": exam.quarter_year,
-            "status": exam.status,
-            "date_published": exam.date_published,
-            "date_start": exam.date_start,
-            "date_end": exam.date_end,
-            "final_grade": exam.final_grade,
-            "student": student.username if student else None
-        })
-    
-    return render_template("teacher_exams.html", {
+    return stream_template("teacher_exams.html", {
         "request": request,
-        "exams": exam_list,
+        "exams": exams,
         "filter_type": filter_type
     })
 
 @app.get("/teacher/analytics", response_class=HTMLResponse)
-async def teacher_analytics_page(request: Request, db: Session = Depends(get_db)):
+def teacher_analytics_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher)
+):
     """Display analytics page."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
     # Get statistics
     total_exams = db.query(Exam).filter(Exam.instructor_id == user.id).count()
@@ -2215,17 +1792,14 @@ async def teacher_analytics_page(request: Request, db: Session = Depends(get_db)
     })
 
 @app.get("/teacher/settings", response_class=HTMLResponse)
-async def teacher_settings_page(request: Request, db: Session = Depends(get_db)):
+def teacher_settings_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher)
+):
     """Display settings page."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
     return render_template("teacher_settings.html", {
         "request": request,
@@ -2233,17 +1807,14 @@ async def teacher_settings_page(request: Request, db: Session = Depends(get_db))
     })
 
 @app.get("/teacher/notifications", response_class=HTMLResponse)
-async def teacher_notifications_page(request: Request, db: Session = Depends(get_db)):
+def teacher_notifications_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: Optional[SessionUser] = Depends(current_teacher)
+):
     """Display all notifications page."""
-    # Get email from cookie
-    email = request.cookies.get("username")
-    if not email:
-        return RedirectResponse(url="/?error=login_required", status_code=302)
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != "teacher":
-        return RedirectResponse(url="/?error=login_required", status_code=302)
+    if user is None:
+        return LOGIN_REQUIRED_REDIRECT
     
     # Get all notifications
     notifications = db.query(Notification).filter(
@@ -2255,7 +1826,7 @@ async def teacher_notifications_page(request: Request, db: Session = Depends(get
         Notification.is_read == False
     ).count()
     
-    return render_template("teacher_notifications.html", {
+    return stream_template("teacher_notifications.html", {
         "request": request,
         "notifications": notifications,
         "unread_count": unread_count
@@ -2268,6 +1839,32 @@ async def question_page(request: Request, question_id: int):
     return render_template("question.html", {"request": request, "question_id": question_id})
 
 
+def run_server():
+    """Run uvicorn: auto-reload in development, multiple workers otherwise.
+    
+    With multiple workers, missing tables are created here once before they
+    start instead of by every worker's lifespan.
+    
+    uvicorn picks uvloop and httptools by itself when they are installed;
+    the uvicorn[standard] extra skips uvloop on Windows.
+    """
+    check_secret_key()
+    settings = get_settings()
+    if settings.environment == "development":
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        # Create the schema once before the workers start, rather than in each
+        # worker's lifespan; the workers inherit the override from the environment.
+        if settings.init_db_on_startup:
+            init_db()
+            os.environ["INIT_DB_ON_STARTUP"] = "false"
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=settings.server_workers or os.cpu_count() or 1
+        )
+
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    run_server()
\ No newline at end of file
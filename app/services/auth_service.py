@@ -1,16 +1,102 @@
+import hmac
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.db.models import User
+from app.core.cache import TTLCache
+
+# Argon2id with the OWASP-recommended parameters (46 MiB, 3 iterations, 1 lane)
+_password_hasher = PasswordHasher(time_cost=3, memory_cost=46 * 1024, parallelism=1)
+
+# Hashing is CPU-bound and allocates 46 MiB per call, so at most one runs per
+# core; the rest of a login burst waits here rather than all allocating at once
+_hashing_slots = threading.BoundedSemaphore(os.cpu_count() or 1)
+
+# Verified against when the email is unknown, so that path costs the same as a
+# wrong password and response timing does not reveal which accounts exist
+_DUMMY_HASH = _password_hasher.hash("not-a-real-password")
+
+# email -> SessionUser, so cookie-authenticated endpoints skip the users SELECT
+_user_cache = TTLCache(maxsize=10_000, ttl=300)
+
+
+@dataclass(frozen=True)
+class SessionUser:
+    """Detached snapshot of the user fields needed to authorize a request."""
+    id: int
+    email: str
+    role: str
+    first_name: str = ""
+    last_name: str = ""
+
+
+def get_user_by_email_cached(db: Session, email: str) -> Optional[SessionUser]:
+    """Look up a user by email, serving repeat lookups from an in-process cache."""
+    cached = _user_cache.get(email)
+    if cached is not None:
+        return cached
+
+    user = db.query(User).filter(User.email == email).first()
+    if not user:
+        return None
+
+    cached = SessionUser(
+        id=user.id,
+        email=user.email,
+        role=user.role,
+        first_name=user.first_name,
+        last_name=user.last_name
+    )
+    _user_cache.set(email, cached)
+    return cached
+
+
+def hash_password(password: str) -> str:
+    """Hash a password with Argon2id for storage in User.password_hash."""
+    with _hashing_slots:
+        return _password_hasher.hash(password)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """Check a password against a stored hash.
+    
+    Accounts created before hashing was introduced still hold the plain-text
+    password; those are compared directly and upgraded on the next login.
+    """
+    if password_hash.startswith("$argon2"):
+        try:
+            with _hashing_slots:
+                return _password_hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return hmac.compare_digest(password_hash.encode("utf-8"), password.encode("utf-8"))
+
 
 def authenticate_user(db: Session, email: str, password: str):
+    # No account has an empty email, so there is nothing to look up or
+    # hide; the login route pads every attempt to the same duration anyway
+    if not email:
+        return None
+
     user = db.query(User).filter(User.email == email).first()
     if not user:
+        verify_password(_DUMMY_HASH, password)
         return None
 
-    # Plain-text comparison (NO hashing)
-    if user.password_hash != password:
+    if not verify_password(user.password_hash, password):
         return None
 
+    # Upgrade legacy plain-text rows and hashes made with older parameters
+    if (not user.password_hash.startswith("$argon2")
+            or _password_hasher.check_needs_rehash(user.password_hash)):
+        user.password_hash = hash_password(password)
+        db.commit()
+
     return user
 
 def create_user(db: Session, email: str, password: str, role: str = "student", 
@@ -21,7 +107,7 @@ def create_user(db: Session, email: str, password: str, role: str = "student",
     Args:
         db: Database session
         email: User email (must be unique)
-        password: User password (stored as-is, no hashing)
+        password: User password (stored as an Argon2id hash)
         role: User role (default: "student")
         first_name: User's first name
         last_name: User's last name
@@ -32,14 +118,13 @@ def create_user(db: Session, email: str, password: str, role: str = "student",
         User object if created successfully, None if email already exists
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == email).first()
-    if existing_user:
+    if db.query(User.id).filter(User.email == email).first() is not None:
         return None
     
-    # Create new user (plain-text password, no hashing)
+    # Create new user
     user = User(
         email=email,
-        password_hash=password,
+        password_hash=hash_password(password),
         role=role,
         first_name=first_name,
         last_name=last_name,
@@ -51,6 +136,7 @@ def create_user(db: Session, email: str, password: str, role: str = "student",
         db.add(user)
         db.commit()
         db.refresh(user)
+        _user_cache.delete(email)
         return user
     except IntegrityError:
         db.rollback()
@@ -1,20 +1,106 @@
 """Email service for sending notifications using SendGrid API."""
 import html
+import re
+from functools import lru_cache
 from typing import Optional
 import logging
+import httpx
 from app.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
 # Try to import SendGrid, but handle gracefully if not installed
 try:
-    from sendgrid import SendGridAPIClient
-    from sendgrid.helpers.mail import Mail, Email, Content
+    from sendgrid.helpers.mail import Mail, Email, To, Content
     SENDGRID_AVAILABLE = True
 except ImportError:
     SENDGRID_AVAILABLE = False
     logger.warning("SendGrid library not installed. Run: pip install sendgrid")
 
+SENDGRID_API_URL = "https://api.sendgrid.com"
+
+# Rejects addresses that could never be delivered before any network work
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+# Skeleton of the dispute notification email (HTML and plain-text parts),
+# filled in with str.format
+_DISPUTE_EMAIL_HTML = """
+        <html>
+        <head>
+            <style>
+                body {{
+                    font-family: Arial, sans-serif;
+                    line-height: 1.6;
+                    color: #333;
+                }}
+                .container {{
+                    max-width: 800px;
+                    margin: 0 auto;
+                    padding: 20px;
+                }}
+                .header {{
+                    background-color: #fff3cd;
+                    border-left: 4px solid #ff9800;
+                    padding: 20px;
+                    border-radius: 8px;
+                    margin-bottom: 20px;
+                }}
+                .header h1 {{
+                    margin: 0;
+                    color: #856404;
+                }}
+                .content {{
+                    background-color: #f8f9fa;
+                    padding: 20px;
+                    border-radius: 8px;
+                }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>⚠️ Grade Dispute Notification</h1>
+                    <p><strong>Subject:</strong> {subject}</p>
+                </div>
+                <div class="content">
+                    {exam_details_html}
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+
+_DISPUTE_EMAIL_TEXT = """
+Grade Dispute Notification
+
+Subject: {subject}
+
+A student has disputed their grade. Please review the exam details in the application.
+
+Student: {student_name}
+Course: {course_number}
+Exam: {exam_name}
+
+Please log in to the application to view full details and the student's dispute reason.
+        """
+
+# Status badge shown in the exam-details email; any other status reads as Draft
+_STATUS_BADGES = {
+    'active': '<span style="background-color: #4CAF50; color: white; padding: 5px 12px; border-radius: 12px; font-size: 0.85em;">Active</span>',
+    'completed': '<span style="background-color: #2196F3; color: white; padding: 5px 12px; border-radius: 12px; font-size: 0.85em;">Completed</span>',
+    'disputed': '<span style="background-color: #ff9800; color: white; padding: 5px 12px; border-radius: 12px; font-size: 0.85em;">Disputed</span>',
+    'not_started': '<span style="background-color: #ff9800; color: white; padding: 5px 12px; border-radius: 12px; font-size: 0.85em;">Not Started</span>',
+}
+_DRAFT_BADGE = '<span style="background-color: #9e9e9e; color: white; padding: 5px 12px; border-radius: 12px; font-size: 0.85em;">Draft</span>'
+
+
+def _format_datetime(dt) -> str:
+    """Format a timestamp for the exam-details email, or 'N/A' if missing."""
+    if dt:
+        return dt.strftime('%m/%d/%Y %I:%M %p')
+    return 'N/A'
+
 
 class EmailService:
     """Service for sending emails via SendGrid API."""
@@ -24,19 +110,34 @@ class EmailService:
         self._client = None
     
     def _get_client(self):
-        """Get or create SendGrid client."""
+        """Get or create the HTTP client for the SendGrid API.
+        
+        One keep-alive client is reused for every send, so only the first
+        email pays for the TCP/TLS handshake. Failed connections are retried.
+        """
         if not SENDGRID_AVAILABLE:
             return None
         
         if self._client is None and self.settings.sendgrid_api_key:
             try:
-                self._client = SendGridAPIClient(self.settings.sendgrid_api_key)
+                self._client = httpx.Client(
+                    base_url=SENDGRID_API_URL,
+                    headers={"Authorization": f"Bearer {self.settings.sendgrid_api_key}"},
+                    timeout=10.0,
+                    transport=httpx.HTTPTransport(retries=3)
+                )
             except Exception as e:
-                logger.error(f"Failed to initialize SendGrid client: {e}")
+                logger.error("Failed to initialize SendGrid client: %s", e)
                 return None
         
         return self._client
     
+    def close(self) -> None:
+        """Close the pooled connections to the SendGrid API, if any were opened."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+    
     def send_email(
         self,
         to_email: str,
@@ -55,12 +156,17 @@ class EmailService:
         Returns:
             True if email sent successfully, False otherwise
         """
+        if not _EMAIL_RE.match(to_email or ""):
+            logger.warning("Not sending email to invalid address %r: %s", to_email, subject)
+            return False
+        
         # Check if SendGrid is configured
         if not self.settings.sendgrid_api_key:
             logger.warning(
-                f"Email not configured - SendGrid API key missing. "
-                f"Add SENDGRID_API_KEY to your .env file. "
-                f"Skipping email send to {to_email}."
+                "Email not configured - SendGrid API key missing. "
+                "Add SENDGRID_API_KEY to your .env file. "
+                "Skipping email send to %s.",
+                to_email
             )
             return False
         
@@ -81,7 +187,7 @@ class EmailService:
                 self.settings.email_from_address,
                 self.settings.email_from_name
             )
-            to_email_obj = Email(to_email)
+            to_email_obj = To(to_email)
             
             # Create content
             html_content = Content("text/html", html_body)
@@ -100,23 +206,24 @@ class EmailService:
                 message.add_content(text_content)
             
             # Send email
-            response = client.send(message)
+            response = client.post("/v3/mail/send", json=message.get())
             
             # Check response status
             if response.status_code in [200, 201, 202]:
-                logger.info(f"Email sent successfully to {to_email}: {subject}")
+                logger.info("Email sent successfully to %s: %s", to_email, subject)
                 return True
             else:
                 logger.error(
-                    f"SendGrid API returned status {response.status_code} when sending to {to_email}. "
-                    f"Response: {response.body}"
+                    "SendGrid API returned status %s when sending to %s. Response: %s",
+                    response.status_code, to_email, response.text
                 )
                 return False
                 
         except Exception as e:
             logger.error(
-                f"Error sending email to {to_email} via SendGrid: {e}. "
-                f"Check your SENDGRID_API_KEY in .env file.",
+                "Error sending email to %s via SendGrid: %s. "
+                "Check your SENDGRID_API_KEY in .env file.",
+                to_email, e,
                 exc_info=True
             )
             return False
@@ -143,65 +250,17 @@ class EmailService:
         """
         subject = f"{student_name} {course_number} {exam_name} GRADE DISPUTED"
         
-        html_body = f"""
-        <html>
-        <head>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                }}
-                .container {{
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }}
-                .header {{
-                    background-color: #fff3cd;
-                    border-left: 4px solid #ff9800;
-                    padding: 20px;
-                    border-radius: 8px;
-                    margin-bottom: 20px;
-                }}
-                .header h1 {{
-                    margin: 0;
-                    color: #856404;
-                }}
-                .content {{
-                    background-color: #f8f9fa;
-                    padding: 20px;
-                    border-radius: 8px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>⚠️ Grade Dispute Notification</h1>
-                    <p><strong>Subject:</strong> {subject}</p>
-                </div>
-                <div class="content">
-                    {exam_details_html}
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        html_body = _DISPUTE_EMAIL_HTML.format(
+            subject=html.escape(subject),
+            exam_details_html=exam_details_html
+        )
         
-        text_body = f"""
-Grade Dispute Notification
-
-Subject: {subject}
-
-A student has disputed their grade. Please review the exam details in the application.
-
-Student: {student_name}
-Course: {course_number}
-Exam: {exam_name}
-
-Please log in to the application to view full details and the student's dispute reason.
-        """
+        text_body = _DISPUTE_EMAIL_TEXT.format(
+            subject=subject,
+            student_name=student_name,
+            course_number=course_number,
+            exam_name=exam_name
+        )
         
         return self.send_email(to_email, subject, html_body, text_body)
     
@@ -217,19 +276,12 @@ Please log in to the application to view full details and the student's dispute
         Args:
             exam: Exam object
             student_name: Student's name
-            questions: List of Question objects
+            questions: List of Question objects, in question_number order
             dispute_reason: Optional dispute reason
         
         Returns:
             HTML string with exam details
         """
-        from datetime import datetime
-        
-        def format_datetime(dt):
-            if dt:
-                return dt.strftime('%m/%d/%Y %I:%M %p')
-            return 'N/A'
-        
         # Build dispute notice if disputed
         dispute_section = ""
         if dispute_reason:
@@ -245,17 +297,7 @@ Please log in to the application to view full details and the student's dispute
             """
         
         # Build exam information section
-        status_badge = ""
-        if exam.status == 'active':
-            status_badge = '<span style="background-color: #4CAF50; color: white; padding: 5px 12px; border-radius: 12px; font-size: 0.85em;">Active</span>'
-        elif exam.status == 'completed':
-            status_badge = '<span style="background-color: #2196F3; color: white; padding: 5px 12px; border-radius: 12px; font-size: 0.85em;">Completed</span>'
-        elif exam.status == 'disputed':
-            status_badge = '<span style="background-color: #ff9800; color: white; padding: 5px 12px; border-radius: 12px; font-size: 0.85em;">Disputed</span>'
-        elif exam.status == 'not_started':
-            status_badge = '<span style="background-color: #ff9800; color: white; padding: 5px 12px; border-radius: 12px; font-size: 0.85em;">Not Started</span>'
-        else:
-            status_badge = '<span style="background-color: #9e9e9e; color: white; padding: 5px 12px; border-radius: 12px; font-size: 0.85em;">Draft</span>'
+        status_badge = _STATUS_BADGES.get(exam.status, _DRAFT_BADGE)
         
         exam_info_html = f"""
         <div style="background-color: white; padding: 20px; border-radius: 8px; margin-bottom: 20px;">
@@ -295,7 +337,7 @@ Please log in to the application to view full details and the student's dispute
                 </tr>
                 <tr>
                     <td style="padding: 10px; background-color: #f8f9fa; font-weight: 600; color: #666;">Completed At</td>
-                    <td style="padding: 10px; color: #333;">{format_datetime(exam.completed_at)}</td>
+                    <td style="padding: 10px; color: #333;">{_format_datetime(exam.completed_at)}</td>
                 </tr>
             </table>
         </div>
@@ -304,12 +346,13 @@ Please log in to the application to view full details and the student's dispute
         # Build questions section
         questions_html = ""
         if questions:
-            questions_html = '<div style="background-color: white; padding: 20px; border-radius: 8px; margin-bottom: 20px;"><h2 style="margin-top: 0; color: #333; border-bottom: 2px solid #4CAF50; padding-bottom: 10px;">Questions and Answers</h2>'
-            for question in sorted(questions, key=lambda q: q.question_number):
+            # Collected as chunks and joined once rather than grown with +=
+            parts = ['<div style="background-color: white; padding: 20px; border-radius: 8px; margin-bottom: 20px;"><h2 style="margin-top: 0; color: #333; border-bottom: 2px solid #4CAF50; padding-bottom: 10px;">Questions and Answers</h2>']
+            for question in questions:
                 grade_display = f'{question.grade * 100:.1f}%' if question.grade is not None else 'Not graded yet'
                 grade_color = '#4CAF50' if question.grade is not None else '#999'
                 
-                questions_html += f"""
+                parts.append(f"""
                 <div style="margin-bottom: 30px; padding: 20px; background-color: #f8f9fa; border-radius: 8px; border-left: 4px solid #4CAF50;">
                     <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px;">
                         <h3 style="margin: 0; color: #333;">Question {question.question_number}</h3>
@@ -323,51 +366,52 @@ Please log in to the application to view full details and the student's dispute
                             {html.escape(question.question_text)}
                         </div>
                     </div>
-                """
+                """)
                 
                 if question.context:
-                    questions_html += f"""
+                    parts.append(f"""
                     <div style="margin-bottom: 15px;">
                         <strong style="color: #666; display: block; margin-bottom: 5px;">Context:</strong>
                         <div style="padding: 12px; background-color: white; border-radius: 4px; color: #666; font-size: 0.95em;">
                             {html.escape(question.context)}
                         </div>
                     </div>
-                    """
+                    """)
                 
                 if question.rubric:
-                    questions_html += f"""
+                    parts.append(f"""
                     <div style="margin-bottom: 15px;">
                         <strong style="color: #666; display: block; margin-bottom: 5px;">Rubric:</strong>
                         <div style="padding: 12px; background-color: white; border-radius: 4px; color: #666; font-size: 0.95em;">
                             {html.escape(question.rubric)}
                         </div>
                     </div>
-                    """
+                    """)
                 
                 if question.student_answer:
-                    questions_html += f"""
+                    parts.append(f"""
                     <div style="margin-bottom: 15px;">
                         <strong style="color: #666; display: block; margin-bottom: 5px;">Student Answer:</strong>
                         <div style="padding: 12px; background-color: #e7f3ff; border-radius: 4px; color: #333; white-space: pre-wrap; word-wrap: break-word;">
                             {html.escape(question.student_answer)}
                         </div>
                     </div>
-                    """
+                    """)
                 
                 if question.feedback:
-                    questions_html += f"""
+                    parts.append(f"""
                     <div style="margin-bottom: 15px;">
                         <strong style="color: #666; display: block; margin-bottom: 5px;">Feedback:</strong>
                         <div style="padding: 12px; background-color: white; border-radius: 4px; color: #333;">
                             {html.escape(question.feedback)}
                         </div>
                     </div>
-                    """
+                    """)
                 
-                questions_html += "</div>"
+                parts.append("</div>")
             
-            questions_html += "</div>"
+            parts.append("</div>")
+            questions_html = "".join(parts)
         
         # Combine all sections
         full_html = f"""
@@ -377,3 +421,9 @@ Please log in to the application to view full details and the student's dispute
         """
         
         return full_html
+
+
+@lru_cache()
+def get_email_service() -> EmailService:
+    """Get the shared email service, so its SendGrid client is built once per process."""
+    return EmailService()
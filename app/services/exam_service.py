@@ -1,17 +1,63 @@
 """Exam service for managing exam workflow."""
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from sqlalchemy.orm import Session
-from app.db.models import Exam, Question
+from app.db.models import Exam, Question, Student
 from app.db.repo import ExamRepository, QuestionRepository, StudentRepository
+from app.services.notification_service import notification_service
 from app.core.grading.generator import QuestionGenerator
 from app.core.grading.grader import AnswerGrader
 from app.core.grading.finalizer import FinalGradeCalculator
 from app.core.grading.thresholds import should_ask_followup
 from app.settings import get_settings
+from app.core.cache import TTLCache
+from app.services.auth_service import get_user_by_email_cached
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Published, non-terminated template exams as plain dicts. Every student sees
+# the same list, so one entry serves all dashboards until an exam is
+# published or terminated; the TTL bounds staleness across worker processes.
+_open_exams_cache = TTLCache(maxsize=1, ttl=30)
+
+
+def get_open_exams(db: Session) -> List[dict]:
+    """Return the exams currently open to students, newest first."""
+    open_exams = _open_exams_cache.get("open_exams")
+    if open_exams is not None:
+        return open_exams
+
+    # Select only the columns the dashboard shows, as plain rows rather
+    # than full ORM objects
+    rows = db.query(
+        Exam.exam_id,
+        Exam.course_number,
+        Exam.section,
+        Exam.exam_name,
+        Exam.quarter_year,
+        Exam.instructor_name,
+        Exam.date_published,
+        Exam.date_start,
+        Exam.date_end,
+        Exam.is_timed,
+        Exam.duration_hours,
+        Exam.duration_minutes
+    ).filter(
+        Exam.date_published.isnot(None),  # Must be published
+        Exam.status != "terminated",  # Not terminated
+        Exam.student_id.is_(None)  # Only template exams (instructor-created)
+    ).order_by(Exam.date_published.desc()).all()
+
+    open_exams = [dict(row._mapping, status="active") for row in rows]
+    _open_exams_cache.set("open_exams", open_exams)
+    return open_exams
+
+
+def invalidate_open_exams() -> None:
+    """Drop the cached open exam list after an exam is published or terminated."""
+    _open_exams_cache.delete("open_exams")
+
+
 class ExamService:
     """Service for managing exam sessions and workflow."""
     
@@ -76,7 +122,7 @@ class ExamService:
 
         return exam
     
-    async def get_current_question(self, db: Session, exam_id: int) -> Optional[Question]:
+    def get_current_question(self, db: Session, exam_id: int) -> Optional[Question]:
         """Get the current unanswered question for an exam."""
         questions = QuestionRepository.get_by_exam(db, exam_id)
         for question in questions:
@@ -84,8 +130,12 @@ class ExamService:
                 return question
         return None
     
-    async def submit_answer(self, db: Session, question_id: int, answer: str) -> Question:
-        """Submit an answer for a question."""
+    async def submit_answer(self, db: Session, question_id: int, answer: str) -> Tuple[Optional[Question], int, int]:
+        """Submit an answer for a question.
+
+        Returns the question along with the exam's answered and total
+        question counts, so callers can tell whether the exam is finished.
+        """
         question = QuestionRepository.update_answer(db, question_id, answer)
         
         if question:
@@ -105,8 +155,12 @@ class ExamService:
                 )
             except Exception as e:
                 logger.error(f"Error grading answer: {e}")
+            
+            questions_completed, total_questions = QuestionRepository.count_answered(db, question.exam_id)
+        else:
+            questions_completed, total_questions = 0, 0
         
-        return question
+        return question, questions_completed, total_questions
     
     async def complete_exam(self, db: Session, exam_id: int) -> Exam:
         """Calculate final grade and complete the exam."""
@@ -154,16 +208,13 @@ class ExamService:
         
         # Create notification for instructor when exam is completed
         if exam and exam.instructor_id:
-            from app.services.notification_service import NotificationService
-            notification_service = NotificationService()
             
             # Get student info for the notification
             student_name = "Student"
             if exam.student_id:
-                from app.db.models import Student, User
-                student = db.query(Student).filter(Student.id == exam.student_id).first()
+                student = db.get(Student, exam.student_id)
                 if student:
-                    user = db.query(User).filter(User.email == student.username).first()
+                    user = get_user_by_email_cached(db, student.username)
                     if user:
                         student_name = f"{user.first_name} {user.last_name}".strip() or student.username
             
@@ -197,3 +248,6 @@ class ExamService:
             "current_question": answered_count + 1 if exam.status == "in_progress" else None
         }
 
+
+# Shared instance; keeps the lazily created LLM clients alive across requests
+exam_service = ExamService()
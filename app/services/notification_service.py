@@ -1,4 +1,5 @@
 """Notification service for creating and managing notifications."""
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.db.models import Notification
 import logging
@@ -55,27 +56,38 @@ class NotificationService:
         
         return query.all()
     
-    def mark_as_read(self, db: Session, notification_id: int, user_id: int) -> bool:
-        """Mark a notification as read."""
-        notification = db.query(Notification).filter(
-            Notification.id == notification_id,
-            Notification.user_id == user_id
-        ).first()
+    def mark_as_read(self, db: Session, notification_id: int, user_id: int):
+        """Mark a notification as read.
         
-        if notification:
-            notification.is_read = True
-            db.commit()
-            return True
-        return False
+        Authorizes and updates in a single UPDATE ... RETURNING statement.
+        Returns a (notification_type, related_exam_id) row, or None if the
+        notification does not exist or belongs to another user.
+        """
+        row = db.execute(
+            update(Notification)
+            .where(
+                Notification.id == notification_id,
+                Notification.user_id == user_id
+            )
+            .values(is_read=True)
+            .returning(Notification.notification_type, Notification.related_exam_id)
+        ).first()
+        db.commit()
+        return row
     
     def mark_all_as_read(self, db: Session, user_id: int) -> int:
-        """Mark all notifications as read for a user."""
-        count = db.query(Notification).filter(
-            Notification.user_id == user_id,
-            Notification.is_read == False
-        ).update({"is_read": True})
+        """Mark all notifications as read for a user with a single UPDATE."""
+        result = db.execute(
+            update(Notification)
+            .where(
+                Notification.user_id == user_id,
+                Notification.is_read == False
+            )
+            .values(is_read=True)
+            .execution_options(synchronize_session=False)
+        )
         db.commit()
-        return count
+        return result.rowcount
     
     def get_unread_count(self, db: Session, user_id: int) -> int:
         """Get count of unread notifications for a user."""
@@ -97,3 +109,7 @@ class NotificationService:
             logger.info(f"Deleted notification {notification_id} for user {user_id}")
             return True
         return False
+
+
+# Stateless, so a single shared instance serves every request
+notification_service = NotificationService()
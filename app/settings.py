@@ -4,6 +4,10 @@ from functools import lru_cache
 from pathlib import Path
 
 
+# Placeholder session-signing key; only accepted in development
+DEFAULT_SECRET_KEY = "change-this-in-production"
+
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     
@@ -12,14 +16,30 @@ class Settings(BaseSettings):
     llm_model: str = "meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo"  # Serverless model (no dedicated endpoint needed)
     llm_temperature: float = 0.7
     llm_max_tokens: int = 2000
+    llm_json_mode: bool = True  # Request response_format=json_object; disable for models without JSON mode
+    llm_max_concurrency: int = 5  # Question requests in flight at once while generating an exam
+    llm_cache_path: str = ""  # SQLite file for the LLM response cache (empty = in-memory, per process)
     
     # Database Configuration
     database_url: str = "sqlite:///./exam_grader.db"
+    db_pool_size: int = 20  # Connections kept open in the pool
+    db_max_overflow: int = 10  # Extra connections allowed under burst load
+    db_pool_timeout: int = 30  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Seconds before a pooled connection is replaced
+    init_db_on_startup: bool = True  # Create missing tables at startup (once, before multiple workers start); turn off once `python -m app.db.init_db` has run
     
     # Application Settings
-    secret_key: str = "change-this-in-production"
+    secret_key: str = DEFAULT_SECRET_KEY  # Signs session cookies; must be set outside development
     environment: str = "development"
     
+    # Server Configuration
+    # Worker threads for sync handlers and run_in_threadpool calls (0 = max(64, 4 x CPU count))
+    threadpool_size: int = 0
+    # Uvicorn worker processes outside development (0 = CPU count)
+    server_workers: int = 0
+    # Seconds browsers may reuse /static assets without revalidating (0 = always revalidate)
+    static_max_age: int = 3600
+    
     # Exam Configuration
     exam_question_count: int = 3
     exam_time_limit_minutes: int = 60
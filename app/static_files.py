@@ -0,0 +1,30 @@
+"""Static file serving with browser caching."""
+import os
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that lets browsers reuse assets for ``max_age`` seconds.
+    
+    Starlette already answers conditional requests (ETag / Last-Modified)
+    with 304; the Cache-Control header lets browsers skip the request
+    entirely while the copy is fresh. Asset URLs aren't fingerprinted, so
+    the lifetime is kept short rather than marked immutable.
+    """
+
+    def __init__(self, *args, max_age: int = 3600, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = f"public, max-age={max_age}"
+
+    def file_response(
+        self,
+        full_path: "os.PathLike[str]",
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["Cache-Control"] = self.cache_control
+        return response
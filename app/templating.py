@@ -0,0 +1,57 @@
+"""Shared Jinja2 environment and template rendering helpers."""
+from fastapi.responses import HTMLResponse, StreamingResponse
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+from app.settings import get_settings
+
+# Outside development, skip the per-request stat() of template files and keep
+# compiled bytecode on disk so new workers don't recompile every template.
+# Without a directory argument Jinja uses a per-user cache directory that it
+# creates with 0700 permissions and checks is owned by this user.
+env = Environment(
+    loader=FileSystemLoader("app/templates"),
+    auto_reload=get_settings().environment == "development",
+    cache_size=400,
+    bytecode_cache=FileSystemBytecodeCache()
+)
+
+# Every page template compiled once at import outside development, so a
+# render is a plain dict lookup. Empty in development to keep auto-reload.
+TEMPLATES = {}
+if not env.auto_reload:
+    TEMPLATES = {name: env.get_template(name) for name in env.list_templates(extensions=["html"])}
+
+
+def get_template(template_name: str):
+    """Return the compiled template, falling back to the environment's loader."""
+    template = TEMPLATES.get(template_name)
+    if template is None:
+        template = env.get_template(template_name)
+    return template
+
+
+def render_template(template_name: str, context: dict) -> HTMLResponse:
+    """Render a Jinja2 template."""
+    template = get_template(template_name)
+    html_content = template.render(context)
+    return HTMLResponse(content=html_content)
+
+
+def _buffered(chunks, chunk_size: int = 8192):
+    """Coalesce Jinja's many small output strings into larger encoded chunks."""
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= chunk_size:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def stream_template(template_name: str, context: dict) -> StreamingResponse:
+    """Stream a Jinja2 template to the client as it renders."""
+    template = get_template(template_name)
+    return StreamingResponse(_buffered(template.generate(context)), media_type="text/html; charset=utf-8")
@@ -1,15 +1,14 @@
 """Simple script to run the application."""
 from urllib.request import Request
 from app.api.exam import render_template
-import uvicorn
 from pathlib import Path
+from dotenv import dotenv_values, set_key
 
 from app.settings import get_settings
 
 
 def prompt_for_api_key():
     """Interactively prompt user for API key if not set."""
-    get_settings.cache_clear()
     settings = get_settings()
     
     # Check if API key is already set
@@ -35,34 +34,12 @@ def prompt_for_api_key():
         if api_key:
             # Save to .env file
             env_path = Path(__file__).parent / ".env"
+            env_path.touch(exist_ok=True)
             
-            # Read existing .env file if it exists
-            env_content = ""
-            if env_path.exists():
-                env_content = env_path.read_text(encoding='utf-8')
-            
-            # Update or add TOGETHER_API_KEY
-            lines = env_content.split('\n') if env_content else []
-            updated = False
-            for i, line in enumerate(lines):
-                if line.startswith('TOGETHER_API_KEY='):
-                    lines[i] = f'TOGETHER_API_KEY={api_key}'
-                    updated = True
-                    break
-            
-            if not updated:
-                # Add new line if doesn't exist
-                if lines and lines[-1]:  # Add newline separator if there's existing content
-                    lines.append('')
-                lines.append(f'TOGETHER_API_KEY={api_key}')
-            
-            # Ensure DATABASE_URL exists
-            has_db_url = any(line.startswith('DATABASE_URL=') for line in lines)
-            if not has_db_url:
-                lines.append('DATABASE_URL=sqlite:///./exam_grader.db')
-            
-            # Write back to .env
-            env_path.write_text('\n'.join(lines), encoding='utf-8')
+            # Update or add TOGETHER_API_KEY, and make sure DATABASE_URL exists
+            set_key(env_path, 'TOGETHER_API_KEY', api_key, quote_mode='never')
+            if 'DATABASE_URL' not in dotenv_values(env_path):
+                set_key(env_path, 'DATABASE_URL', 'sqlite:///./exam_grader.db', quote_mode='never')
             
             print("\n✅ API key saved to .env file!")
             print("   The app will now use AI features when you restart.\n")
@@ -92,5 +69,6 @@ if __name__ == "__main__":
     print("\n📍 Server starting at http://localhost:8000")
     print("   Press CTRL+C to stop\n")
     
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    from app.main import run_server
+    run_server()
 
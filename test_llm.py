@@ -5,7 +5,6 @@ from app.settings import get_settings
 
 async def test_llm():
     """Test if LLM client can make a call."""
-    get_settings.cache_clear()
     settings = get_settings()
     
     print(f"API Key: {'SET (' + settings.together_api_key[:10] + '...)' if settings.together_api_key else 'NOT SET'}")
@@ -2,6 +2,7 @@
 import asyncio
 import logging
 import sys
+import time
 from app.core.grading.generator import QuestionGenerator
 from app.settings import get_settings
 
@@ -11,8 +12,12 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
-async def test_exam_generation():
-    """Test exam generation with detailed logging."""
+async def test_exam_generation(n: int = 1):
+    """Test exam generation with detailed logging.
+    
+    With ``n`` above 1, generate that many exams at once instead, to check
+    that concurrent generations overlap rather than queue behind each other.
+    """
     settings = get_settings()
     print(f"\n{'='*60}")
     print("LLM Exam Generation Diagnostic Test")
@@ -28,13 +33,40 @@ async def test_exam_generation():
         print("Please set it in your .env file or as an environment variable.")
         return
     
+    num_questions = 8  # Test with 8 questions like the user reported
+    
+    if n > 1:
+        print(f"Generating {n} exams of {num_questions} questions concurrently on topic: 'Data Structures'...")
+        print("-" * 60)
+        
+        async def timed_generation():
+            started = time.perf_counter()
+            await QuestionGenerator().generate_exam(topic="Data Structures", num_questions=num_questions)
+            return time.perf_counter() - started
+        
+        started = time.perf_counter()
+        results = await asyncio.gather(*[timed_generation() for _ in range(n)], return_exceptions=True)
+        total = time.perf_counter() - started
+        
+        print("\n" + "="*60)
+        for i, result in enumerate(results, 1):
+            if isinstance(result, Exception):
+                print(f"Exam {i}: FAILED ({type(result).__name__}: {result})")
+            else:
+                print(f"Exam {i}: {result:.1f}s")
+        durations = [r for r in results if not isinstance(r, Exception)]
+        if durations:
+            print(f"Wall time: {total:.1f}s vs {sum(durations):.1f}s if run one after another")
+        print("="*60)
+        return
+    
     generator = QuestionGenerator()
     
     try:
-        num_questions = 8  # Test with 8 questions like the user reported
         print(f"Generating exam with {num_questions} questions on topic: 'Data Structures'...")
         print("-" * 60)
         
+        started = time.perf_counter()
         generated_exam = await generator.generate_exam(
             topic="Data Structures",
             num_questions=num_questions,
@@ -42,7 +74,7 @@ async def test_exam_generation():
         )
         
         print("\n" + "="*60)
-        print("SUCCESS! Exam generated successfully!")
+        print(f"SUCCESS! Exam generated successfully in {time.perf_counter() - started:.1f}s!")
         print("="*60)
         print(f"Number of questions: {len(generated_exam.questions)}\n")
         
@@ -64,4 +96,5 @@ async def test_exam_generation():
         print(traceback.format_exc())
 
 if __name__ == "__main__":
-    asyncio.run(test_exam_generation())
+    # Optional argument: number of exams to generate concurrently
+    asyncio.run(test_exam_generation(int(sys.argv[1]) if len(sys.argv) > 1 else 1))
@@ -12,18 +12,18 @@ q4 = "What are the different types of data structures?"
 print("Similarity Test Results:")
 print("=" * 60)
 
-# Normalize and calculate similarity
-norm1 = generator._normalize(q1)
-norm2 = generator._normalize(q2)
-norm3 = generator._normalize(q3)
-norm4 = generator._normalize(q4)
-
-similarity_1_2 = generator._calculate_similarity(norm1, norm2)
-similarity_1_3 = generator._calculate_similarity(norm1, norm3)
-similarity_1_4 = generator._calculate_similarity(norm1, norm4)
-similarity_2_3 = generator._calculate_similarity(norm2, norm3)
-similarity_2_4 = generator._calculate_similarity(norm2, norm4)
-similarity_3_4 = generator._calculate_similarity(norm3, norm4)
+# Normalize, tokenize and calculate similarity
+tokens1 = generator._tokenize(generator._normalize(q1))
+tokens2 = generator._tokenize(generator._normalize(q2))
+tokens3 = generator._tokenize(generator._normalize(q3))
+tokens4 = generator._tokenize(generator._normalize(q4))
+
+similarity_1_2 = generator._calculate_similarity(tokens1, tokens2)
+similarity_1_3 = generator._calculate_similarity(tokens1, tokens3)
+similarity_1_4 = generator._calculate_similarity(tokens1, tokens4)
+similarity_2_3 = generator._calculate_similarity(tokens2, tokens3)
+similarity_2_4 = generator._calculate_similarity(tokens2, tokens4)
+similarity_3_4 = generator._calculate_similarity(tokens3, tokens4)
 
 print(f"Q1: '{q1}'")
 print(f"Q2: '{q2}'")